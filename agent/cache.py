@@ -0,0 +1,292 @@
+"""Bounded, thread-safe search result cache with an optional shared tier."""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from agent.kv_store import KeyValueStore, SQLiteKVStore
+from config import settings
+from db.schemas import RepoResult
+
+
+_RESULT_FIELDS = list(RepoResult.model_fields)
+
+
+def normalize_query(query: str) -> str:
+    """Cache key for a query: lowercased with whitespace collapsed."""
+    return " ".join(query.lower().split())
+
+
+class _Flight:
+    """One in-progress computation that concurrent identical requests wait on."""
+    
+    def __init__(self, top_k: int):
+        self.top_k = top_k
+        self.done = threading.Event()
+        self.response: Optional[Dict[str, Any]] = None
+        self.error: Optional[BaseException] = None
+
+
+def encode_entry(top_k: int, response: Dict[str, Any]) -> bytes:
+    """Serialize a response compactly: results become rows under one field header."""
+    payload = dict(response)
+    payload["results"] = [[getattr(repo, field) for field in _RESULT_FIELDS] for repo in response["results"]]
+    return json.dumps(
+        {"top_k": top_k, "fields": _RESULT_FIELDS, "response": payload},
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def decode_entry(data: bytes) -> Tuple[int, Dict[str, Any]]:
+    """Inverse of ``encode_entry``."""
+    entry = json.loads(data)
+    response = entry["response"]
+    response["results"] = [RepoResult(**dict(zip(entry["fields"], row))) for row in response["results"]]
+    return entry["top_k"], response
+
+
+class SearchCache:
+    """LRU cache of search responses with a time-to-live.
+    
+    Entries are keyed by normalized query and remember the ``top_k`` they were
+    computed for, so a request for fewer results can be served from a larger entry.
+    With a ``shared`` store, local misses fall through to it and writes go to both,
+    and ``get_or_compute`` takes a lease so only one process computes a missing key.
+    Within a process, concurrent misses for the same query share one computation.
+    """
+    
+    def __init__(
+        self,
+        max_entries: Optional[int] = None,
+        ttl: Optional[float] = None,
+        shared: Optional[KeyValueStore] = None,
+        lease_seconds: Optional[float] = None,
+    ):
+        self.max_entries = max_entries if max_entries is not None else settings.SEARCH_CACHE_MAX_ENTRIES
+        self.ttl = ttl if ttl is not None else settings.SEARCH_CACHE_TTL
+        self.shared = shared
+        self.lease_seconds = lease_seconds if lease_seconds is not None else settings.SEARCH_CACHE_LEASE_SECONDS
+        self._entries: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        
+        self.hits = 0
+        self.coalesced = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return now - stored_at >= self.ttl
+    
+    def get(self, query: str, top_k: int) -> Optional[Dict[str, Any]]:
+        """Return a cached response computed for at least ``top_k`` results, or None."""
+        key = normalize_query(query)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry[0], now):
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            
+            if entry is not None and entry[1] >= top_k:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[2]
+        
+        response = self._get_shared(key, top_k)
+        with self._lock:
+            if response is None:
+                self.misses += 1
+            else:
+                self.shared_hits += 1
+        return response
+    
+    def _get_shared(self, key: str, top_k: int) -> Optional[Dict[str, Any]]:
+        """Look ``key`` up in the shared tier and promote a usable entry locally."""
+        if self.shared is None:
+            return None
+        try:
+            data = self.shared.get(key)
+        except Exception as e:
+            print(f"Shared cache read failed: {e}")
+            return None
+        if data is None:
+            return None
+        
+        stored_top_k, response = decode_entry(data)
+        if stored_top_k < top_k:
+            return None
+        with self._lock:
+            self._store(key, stored_top_k, response, time.monotonic())
+        return response
+    
+    def put(self, query: str, top_k: int, response: Dict[str, Any]) -> None:
+        """Store a response, keeping any fresh entry that already covers more results."""
+        key = normalize_query(query)
+        with self._lock:
+            stored = self._store(key, top_k, response, time.monotonic())
+        
+        if stored and self.shared is not None:
+            try:
+                self.shared.set(key, encode_entry(top_k, response), self.ttl)
+            except Exception as e:
+                print(f"Shared cache write failed: {e}")
+    
+    def _store(self, key: str, top_k: int, response: Dict[str, Any], now: float) -> bool:
+        """Insert into the local tier unless a fresh entry already covers more results."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[1] > top_k and not self._expired(entry[0], now):
+            return False
+        
+        self._entries[key] = (now, top_k, response)
+        self._entries.move_to_end(key)
+        self._evict(now)
+        return True
+    
+    def get_or_compute(
+        self,
+        query: str,
+        top_k: int,
+        compute: Callable[[], Dict[str, Any]],
+        cacheable: Callable[[Dict[str, Any]], bool] = lambda response: True,
+        fetch_k: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """Return a cached response or compute it once, however many threads and processes ask.
+        
+        ``top_k`` is how many results the caller needs; ``fetch_k`` (default ``top_k``)
+        is how many ``compute`` produces, which is what the stored entry covers.
+        """
+        cached = self.get(query, top_k)
+        if cached is not None:
+            return cached
+        top_k = max(top_k, fetch_k or 0)
+        
+        key = normalize_query(query)
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight(top_k)
+            elif flight.top_k >= top_k:
+                self.coalesced += 1
+        
+        if not leader:
+            if flight.top_k >= top_k:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+                return flight.response
+            # The in-flight request asks for fewer results than we need
+            return self._compute(query, top_k, compute, cacheable)
+        
+        try:
+            flight.response = self._compute(query, top_k, compute, cacheable)
+            return flight.response
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            flight.done.set()
+    
+    def _compute(
+        self,
+        query: str,
+        top_k: int,
+        compute: Callable[[], Dict[str, Any]],
+        cacheable: Callable[[Dict[str, Any]], bool],
+    ) -> Dict[str, Any]:
+        """Compute and store a response, holding the shared-tier lease if there is one."""
+        lease = f"{normalize_query(query)}\0{top_k}"
+        if self.shared is not None and not self._acquire_lease(lease):
+            cached, acquired = self._wait_for_shared(normalize_query(query), top_k, lease)
+            if cached is not None:
+                return cached
+            if not acquired:
+                lease = None
+        
+        try:
+            response = compute()
+            if cacheable(response):
+                self.put(query, top_k, response)
+            return response
+        finally:
+            if self.shared is not None and lease is not None:
+                self.shared.release_lease(lease)
+    
+    def _acquire_lease(self, lease: str) -> bool:
+        try:
+            return self.shared.acquire_lease(lease, self.lease_seconds)
+        except Exception as e:
+            # Without the shared store we just compute locally
+            print(f"Shared cache lease failed: {e}")
+            return True
+    
+    def _wait_for_shared(self, key: str, top_k: int, lease: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """Poll the shared tier while another process computes ``key``.
+        
+        Returns ``(response, False)`` once it lands. Returns ``(None, True)`` as soon as
+        the leader releases the lease without storing anything (an uncacheable or failed
+        compute); the caller now holds the lease. Returns ``(None, False)`` at the deadline.
+        """
+        deadline = time.monotonic() + self.lease_seconds
+        while time.monotonic() < deadline:
+            time.sleep(settings.SEARCH_CACHE_POLL_SECONDS)
+            response = self._get_shared(key, top_k)
+            if response is not None:
+                with self._lock:
+                    self.shared_hits += 1
+                return response, False
+            if self._acquire_lease(lease):
+                # The leader may have stored its result between the read and the release
+                response = self._get_shared(key, top_k)
+                if response is None:
+                    return None, True
+                self.shared.release_lease(lease)
+                with self._lock:
+                    self.shared_hits += 1
+                return response, False
+        return None, False
+    
+    def _evict(self, now: float) -> None:
+        """Drop expired entries from the cold end, then least recently used ones over capacity."""
+        while self._entries:
+            key, (stored_at, _, _) = next(iter(self._entries.items()))
+            if not self._expired(stored_at, now):
+                break
+            del self._entries[key]
+            self.expirations += 1
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit, miss and eviction counters plus the current size."""
+        lookups = self.hits + self.shared_hits + self.misses
+        return {
+            "hits": self.hits,
+            "shared_hits": self.shared_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": len(self._entries),
+            "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+        }
+
+
+search_cache = SearchCache(
+    shared=SQLiteKVStore(settings.SEARCH_SHARED_CACHE_PATH) if settings.SEARCH_SHARED_CACHE_PATH else None
+)
@@ -0,0 +1,112 @@
+"""Parse structured search filters from queries and translate them for the vector index."""
+
+import re
+from typing import Any, Dict, Optional
+
+from agent.package_detector import package_detector
+from db.packages import canonical_package_name
+from db.schemas import SearchFilters
+
+
+# Lowercase query word -> GitHub's spelling of the language
+LANGUAGES = {
+    "python": "Python",
+    "javascript": "JavaScript",
+    "typescript": "TypeScript",
+    "golang": "Go",
+    "rust": "Rust",
+    "java": "Java",
+    "kotlin": "Kotlin",
+    "swift": "Swift",
+    "ruby": "Ruby",
+    "php": "PHP",
+    "c++": "C++",
+    "cpp": "C++",
+    "c#": "C#",
+    "scala": "Scala",
+    "julia": "Julia",
+    "jupyter": "Jupyter Notebook",
+}
+
+_STARS = re.compile(
+    r"(?:(?:>=?|over|above|more than|at least)\s*(?P<a>\d+(?:\.\d+)?)\s*(?P<a_unit>[km])?\s*\+?"
+    r"|(?P<b>\d+(?:\.\d+)?)\s*(?P<b_unit>[km])?\s*\+)\s*stars?\b",
+    re.IGNORECASE,
+)
+_LANGUAGE_WORD = r"(?<![\w+#])(?P<{}>" + "|".join(re.escape(word) for word in LANGUAGES) + r")(?![\w+#])"
+# Only a language that qualifies what is being searched for is a filter ("rust library",
+# "written in rust"); other mentions ("tools for java developers") stay part of the semantic query
+_LANGUAGE = re.compile(
+    _LANGUAGE_WORD.format("before")
+    + r"\s+(?:repo(?:s|sitory|sitories)?|librar(?:y|ies)|libs?|packages?|projects?|frameworks?|sdks?|clients?)\b"
+    + r"|\b(?:written|implemented) in\s+" + _LANGUAGE_WORD.format("after")
+    + r"|\blanguage:\s*" + _LANGUAGE_WORD.format("tag"),
+    re.IGNORECASE,
+)
+_TOPIC = re.compile(r"(?:topic:|#)([a-z0-9][a-z0-9-]*)", re.IGNORECASE)
+_SEPARATOR = r"\s*,\s*(?:and\s+)?|\s+and\s+"
+_DEPENDS_ON = re.compile(r"\bdepends on ([\w.\-]+(?:(?:" + _SEPARATOR + r")[\w.\-]+)*)", re.IGNORECASE)
+_LIST_SEPARATOR = re.compile(_SEPARATOR, re.IGNORECASE)
+
+
+def _stars(match: "re.Match") -> int:
+    value = float(match.group("a") or match.group("b"))
+    unit = (match.group("a_unit") or match.group("b_unit") or "").lower()
+    return int(value * {"k": 1000, "m": 1000000}.get(unit, 1))
+
+
+def parse_filters(query: str) -> SearchFilters:
+    """Pull language, minimum stars, topics and required dependencies out of a free-text query."""
+    filters = SearchFilters()
+    
+    stars = [_stars(match) for match in _STARS.finditer(query)]
+    if stars:
+        filters.min_stars = max(stars)
+    
+    language = _LANGUAGE.search(query)
+    if language:
+        word = language.group("before") or language.group("after") or language.group("tag")
+        filters.language = LANGUAGES[word.lower()]
+    
+    filters.topics = [topic.lower() for topic in _TOPIC.findall(query)]
+    
+    for match in _DEPENDS_ON.finditer(query):
+        names = [name for name in _LIST_SEPARATOR.split(match.group(1)) if name]
+        filters.depends_on.append(canonical_package_name(names[0]))
+        # "depends on httpx and uses fastapi": the list ends at the first word that is not a known package
+        for name in names[1:]:
+            package = canonical_package_name(name)
+            if package not in package_detector.packages:
+                break
+            filters.depends_on.append(package)
+    
+    return filters
+
+
+def merge_filters(parsed: SearchFilters, explicit: Optional[SearchFilters]) -> SearchFilters:
+    """Explicit (API) filters win field by field over ones parsed from the query."""
+    if explicit is None:
+        return parsed
+    return SearchFilters(
+        language=explicit.language or parsed.language,
+        min_stars=explicit.min_stars or parsed.min_stars,
+        topics=explicit.topics or parsed.topics,
+        depends_on=[canonical_package_name(name) for name in explicit.depends_on] or parsed.depends_on,
+    )
+
+
+def vector_filter(filters: SearchFilters) -> Optional[Dict[str, Any]]:
+    """Pinecone metadata filter equivalent to ``filters``, or None if there is nothing to filter."""
+    clauses = []
+    if filters.language:
+        clauses.append({"language": {"$eq": filters.language}})
+    if filters.min_stars:
+        clauses.append({"stars": {"$gte": filters.min_stars}})
+    if filters.topics:
+        clauses.append({"topics": {"$in": filters.topics}})
+    for package in filters.depends_on:
+        clauses.append({"dependencies": {"$in": [package]}})
+    
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
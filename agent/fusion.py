@@ -0,0 +1,88 @@
+"""Fuse vector and graph result lists into one ranking."""
+
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+from config import settings
+from db.schemas import RepoResult
+
+
+def rrf_scores(ranks: np.ndarray, scores: np.ndarray, weights: np.ndarray, k: float) -> np.ndarray:
+    """Reciprocal Rank Fusion: sum of ``weight / (k + rank)`` over the lists a candidate appears in."""
+    return np.sum(np.where(np.isfinite(ranks), weights[:, None] / (k + ranks), 0.0), axis=0)
+
+
+def weighted_scores(ranks: np.ndarray, scores: np.ndarray, weights: np.ndarray, k: float) -> np.ndarray:
+    """Weighted sum of per-list min-max normalized scores; absent candidates score 0 in that list."""
+    present = np.isfinite(ranks)
+    low = np.min(np.where(present, scores, np.inf), axis=1, keepdims=True)
+    high = np.max(np.where(present, scores, -np.inf), axis=1, keepdims=True)
+    spread = np.where(high > low, high - low, 1.0)
+    # A list whose hits all tie normalizes them to 1
+    normalized = np.where(high > low, (scores - low) / spread, 1.0)
+    return np.sum(np.where(present, weights[:, None] * normalized, 0.0), axis=0)
+
+
+FUSION_METHODS: Dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray, float], np.ndarray]] = {
+    "rrf": rrf_scores,
+    "weighted": weighted_scores,
+}
+
+
+def fuse(
+    vector_results: List[RepoResult],
+    graph_results: List[RepoResult],
+    top_k: int,
+    method: Optional[str] = None,
+    vector_weight: Optional[float] = None,
+    graph_weight: Optional[float] = None,
+    star_prior: Optional[float] = None,
+    rrf_k: Optional[float] = None,
+) -> List[RepoResult]:
+    """Combine both result lists, score every candidate at once and return the best ``top_k``.
+    
+    Graph hits are scored by ``match_count``. With ``star_prior`` > 0 the fused score
+    is scaled by ``1 + star_prior * log1p(stars) / log1p(max stars)``.
+    """
+    method = method or settings.SEARCH_FUSION
+    vector_weight = settings.SEARCH_VECTOR_WEIGHT if vector_weight is None else vector_weight
+    graph_weight = settings.SEARCH_GRAPH_WEIGHT if graph_weight is None else graph_weight
+    star_prior = settings.SEARCH_STAR_PRIOR if star_prior is None else star_prior
+    rrf_k = settings.SEARCH_RRF_K if rrf_k is None else rrf_k
+    
+    candidates: Dict[str, RepoResult] = {}
+    for repo in vector_results + graph_results:
+        candidates.setdefault(repo.full_name, repo)
+    if not candidates:
+        return []
+    
+    column = {full_name: i for i, full_name in enumerate(candidates)}
+    ranks = np.full((2, len(column)), np.inf)
+    scores = np.zeros((2, len(column)))
+    for row, (results, signal) in enumerate((
+        (vector_results, lambda repo: repo.score),
+        (graph_results, lambda repo: max(repo.match_count, 1)),
+    )):
+        for rank, repo in enumerate(results, 1):
+            i = column[repo.full_name]
+            if rank < ranks[row, i]:
+                ranks[row, i] = rank
+                scores[row, i] = signal(repo)
+    
+    fused = FUSION_METHODS[method](ranks, scores, np.array([vector_weight, graph_weight]), rrf_k)
+    
+    if star_prior > 0:
+        stars = np.log1p(np.array([max(repo.stars, 0) for repo in candidates.values()], dtype=np.float64))
+        fused = fused * (1.0 + star_prior * stars / max(stars.max(), 1.0))
+    
+    order = np.argsort(-fused, kind="stable")[:top_k]
+    repos = list(candidates.values())
+    graph_matches = {repo.full_name: repo.match_count for repo in graph_results}
+    return [
+        repos[i].model_copy(update={
+            "score": float(fused[i]),
+            "match_count": graph_matches.get(repos[i].full_name, repos[i].match_count)
+        })
+        for i in order.tolist()
+    ]
@@ -0,0 +1,122 @@
+"""Key-value stores backing the shared search cache tier."""
+
+import threading
+import time
+from typing import Dict, Optional, Protocol, Tuple
+
+from utils.sqlite_store import SQLiteStore
+
+
+class KeyValueStore(Protocol):
+    """Byte-valued store with expiry and leases, shareable between processes."""
+    
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+    
+    def acquire_lease(self, key: str, ttl: float) -> bool:
+        ...
+    
+    def release_lease(self, key: str) -> None:
+        ...
+
+
+class MemoryKVStore:
+    """In-process stand-in for a shared store, e.g. for tests or a single worker."""
+    
+    def __init__(self):
+        self._values: Dict[str, Tuple[float, bytes]] = {}
+        self._leases: Dict[str, float] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None or entry[0] <= time.time():
+                self._values.pop(key, None)
+                return None
+            return entry[1]
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._values[key] = (time.time() + ttl, value)
+    
+    def acquire_lease(self, key: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            if self._leases.get(key, 0.0) > now:
+                return False
+            self._leases[key] = now + ttl
+            return True
+    
+    def release_lease(self, key: str) -> None:
+        with self._lock:
+            self._leases.pop(key, None)
+
+
+class SQLiteKVStore(SQLiteStore):
+    """Store in a local SQLite file that every worker process on the host opens."""
+    
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS entries (
+            key TEXT PRIMARY KEY,
+            value BLOB NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires_at)",
+        """
+        CREATE TABLE IF NOT EXISTS leases (
+            key TEXT PRIMARY KEY,
+            expires_at REAL NOT NULL
+        )
+        """,
+    )
+    
+    def __init__(self, path: str, max_entries: int = 10000):
+        super().__init__(path)
+        self.max_entries = max_entries
+    
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+    
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?)", (key, value, now + ttl))
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            # Entries share one TTL, so the soonest to expire are also the oldest
+            conn.execute("""
+                DELETE FROM entries WHERE key IN (
+                    SELECT key FROM entries ORDER BY expires_at DESC LIMIT -1 OFFSET ?
+                )
+            """, (self.max_entries,))
+    
+    def acquire_lease(self, key: str, ttl: float) -> bool:
+        """Atomically take ``key`` unless another process holds an unexpired lease on it."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM leases WHERE key = ? AND expires_at <= ?", (key, now))
+                acquired = conn.execute(
+                    "INSERT OR IGNORE INTO leases VALUES (?, ?)", (key, now + ttl)
+                ).rowcount == 1
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return acquired
+    
+    def release_lease(self, key: str) -> None:
+        with self._lock:
+            self._connect().execute("DELETE FROM leases WHERE key = ?", (key,))
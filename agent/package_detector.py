@@ -0,0 +1,183 @@
+"""Detect package names in search queries with a token-level Aho-Corasick automaton."""
+
+import re
+import threading
+import time
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import settings
+from db import neo4j_client
+from db.packages import canonical_package_name
+
+
+# Detected before the graph has been read, and if it cannot be
+DEFAULT_PACKAGES = ["langchain", "openai", "pydantic", "fastapi", "streamlit", "transformers", "llama-index", "chromadb", "pinecone"]
+
+# Single-word package names that are also ordinary query words
+STOPWORDS = {
+    "a", "an", "and", "the", "for", "with", "to", "in", "of", "on", "or", "is", "it", "by", "as", "at",
+    "that", "this", "from", "how", "what", "which", "best", "good", "fast", "simple", "easy", "new",
+    "python", "library", "framework", "tool", "tools", "app", "api", "data", "web", "test", "tests",
+    "works", "compatible", "using", "use", "based", "like", "similar", "alternative",
+}
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase alphanumeric runs; ``llama_index``, ``llama-index`` and ``Llama Index`` agree."""
+    return _TOKEN.findall(text.lower())
+
+
+class PackageDetector:
+    """Finds known package names in a query in one pass over its tokens.
+    
+    Patterns are token sequences, so matches always fall on word boundaries. Each
+    multi-token name is also added in its joined form (``llamaindex``). New names
+    are inserted into the trie incrementally; failure links are rebuilt lazily on
+    the next detection.
+    """
+    
+    def __init__(
+        self,
+        source: Optional[Callable[[Optional[int]], Tuple[Iterable[str], int]]] = None,
+        refresh_seconds: Optional[float] = None,
+    ):
+        # source(watermark) -> (names added since the watermark, or all if None; new watermark)
+        self.source = source
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else settings.SEARCH_PACKAGE_REFRESH_SECONDS
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refreshed_at: Optional[float] = None
+        self._watermark: Optional[int] = None
+        
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # (pattern length in tokens, package) ending at each state, including via failure links
+        self._own: List[List[Tuple[int, str]]] = [[]]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+        self._dirty = False
+        self.packages: set = set()
+        
+        self.add_all(DEFAULT_PACKAGES)
+    
+    def _insert(self, tokens: List[str], package: str) -> None:
+        state = 0
+        for token in tokens:
+            next_state = self._goto[state].get(token)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][token] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._own.append([])
+                self._out.append([])
+            state = next_state
+        if (len(tokens), package) not in self._own[state]:
+            self._own[state].append((len(tokens), package))
+            self._dirty = True
+    
+    def add(self, name: str, package: Optional[str] = None) -> None:
+        """Register a package name, or ``name`` as an alias of ``package``."""
+        package = canonical_package_name(package or name)
+        tokens = tokenize(name)
+        if not tokens or (len(tokens) == 1 and (tokens[0] in STOPWORDS or len(tokens[0]) < 2)):
+            return
+        
+        with self._lock:
+            self.packages.add(package)
+            self._insert(tokens, package)
+            if len(tokens) > 1:
+                self._insert(["".join(tokens)], package)
+    
+    def add_all(self, names: Iterable[str]) -> None:
+        """Register many package names."""
+        for name in names:
+            self.add(name)
+    
+    def _build(self) -> None:
+        """Compute failure links and merged outputs breadth-first."""
+        queue = deque()
+        for state in self._goto[0].values():
+            self._fail[state] = 0
+            queue.append(state)
+        self._out[0] = list(self._own[0])
+        
+        while queue:
+            state = queue.popleft()
+            self._out[state] = self._own[state] + self._out[self._fail[state]]
+            for token, child in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(token, 0)
+                queue.append(child)
+        self._dirty = False
+    
+    def refresh(self) -> None:
+        """Add the package names written to the source since the last refresh."""
+        if self.source is None:
+            return
+        try:
+            names, watermark = self.source(self._watermark)
+            names = list(names)
+        except Exception as e:
+            print(f"Package list refresh failed: {e}")
+        else:
+            self.add_all(name for name in names if canonical_package_name(name) not in self.packages)
+            self._watermark = watermark
+        self._refreshed_at = time.monotonic()
+    
+    def _refresh_once(self) -> None:
+        try:
+            self.refresh()
+        finally:
+            self._refreshing = False
+    
+    def _maybe_refresh(self) -> None:
+        """Refresh from the source in the background when stale; only one caller starts it.
+        
+        Queries never wait on the source: until the first load finishes they match
+        ``DEFAULT_PACKAGES``, afterwards whatever the automaton already holds.
+        """
+        if self.source is None:
+            return
+        stale = self._refreshed_at is None or time.monotonic() - self._refreshed_at >= self.refresh_seconds
+        if not stale:
+            return
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._refresh_once, daemon=True).start()
+    
+    def detect(self, query: str) -> List[str]:
+        """Packages mentioned in ``query``, leftmost-longest and without overlaps, in query order."""
+        self._maybe_refresh()
+        tokens = tokenize(query)
+        
+        matches = []
+        with self._lock:
+            if self._dirty:
+                self._build()
+            state = 0
+            for end, token in enumerate(tokens, 1):
+                while state and token not in self._goto[state]:
+                    state = self._fail[state]
+                state = self._goto[state].get(token, 0)
+                for length, package in self._out[state]:
+                    matches.append((end - length, end, package))
+        
+        matches.sort(key=lambda match: (match[0], -match[1]))
+        detected = []
+        covered_until = 0
+        for start, end, package in matches:
+            if start >= covered_until:
+                covered_until = end
+                if package not in detected:
+                    detected.append(package)
+        return detected
+
+
+package_detector = PackageDetector(source=neo4j_client.package_names_since)
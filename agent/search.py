@@ -1,95 +1,157 @@
 """Search agent - simplified to avoid rate limits."""
 
-from typing import List
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from pathlib import Path
+from typing import List, Optional
 import time
 
+from agent.cache import search_cache
+from agent.filters import merge_filters, parse_filters, vector_filter
+from agent.fusion import fuse
+from agent.package_detector import package_detector
 from config import settings
-from db import pinecone_client, neo4j_client, RepoResult
+from db import pinecone_client, neo4j_client, RepoResult, SearchFilters
 
 
-# Simple cache
-_cache = {}
-_cache_ttl = 300
+# Shared by every search so backend calls fan out without per-query thread startup
+_executor = ThreadPoolExecutor(max_workers=settings.SEARCH_MAX_WORKERS, thread_name_prefix="search")
 
 
-def search_repos(query: str, top_k: int = 5) -> dict:
-    """Search repositories using hybrid vector + graph approach."""
-    
-    # Check cache first
-    cache_key = f"{query}_{top_k}"
-    if cache_key in _cache:
-        cached_time, cached_result = _cache[cache_key]
-        if time.time() - cached_time < _cache_ttl:
-            print(f"Returning cached result for: {query}")
-            return cached_result
-    
+def _collect(future: Future, deadline: float, backend: str, missing: List[str]) -> List[RepoResult]:
+    """Wait for ``future`` until ``deadline``; on timeout or error record ``backend`` as missing."""
+    try:
+        return future.result(timeout=max(deadline - time.monotonic(), 0))
+    except TimeoutError:
+        print(f"  {backend} search timed out, continuing without it")
+    except Exception as e:
+        print(f"  {backend} search failed: {e}")
+    missing.append(backend)
+    return []
+
+
+def _explain(query: str, results: List[RepoResult]) -> str:
+    """One-line summary of the results, without an API call."""
+    if results:
+        top_repo = results[0]
+        return f"Found {len(results)} repositories matching '{query}'. Top result: {top_repo.name} with {top_repo.stars:,} stars."
+    return f"No repositories found matching '{query}'."
+
+
+def _for_request(pool: dict, query: str, top_k: int, offset: int) -> dict:
+    """Cut the requested page out of a (possibly cached) candidate pool."""
+    candidates = pool["results"]
+    results = candidates[offset:offset + top_k]
+    return {
+        **pool,
+        "query": query,
+        "results": results,
+        "explanation": _explain(query, results),
+        "offset": offset,
+        "total_candidates": len(candidates),
+        "has_more": offset + top_k < len(candidates) or not pool["exhausted"]
+    }
+
+
+def search_repos(query: str, top_k: int = 5, offset: int = 0, filters: Optional[SearchFilters] = None) -> dict:
+    """Search repositories using hybrid vector + graph approach.
+    
+    Backends are over-fetched into a fused candidate pool that is cached, so later
+    pages (``offset``) are served without searching again. Filters written in the
+    query ("python library", ">1k stars", "#rag", "depends on httpx") and explicit ``filters``
+    are applied inside both backend queries.
+    """
+    needed = offset + top_k
+    pool_size = max(needed, min(top_k * settings.SEARCH_CANDIDATE_MULTIPLIER, settings.SEARCH_MAX_CANDIDATES))
+    # Query-text filters are implied by the key already; explicit ones are not
+    cache_query = query if filters is None or filters.is_empty() else f"{query} {filters.model_dump_json()}"
+    pool = search_cache.get_or_compute(
+        cache_query,
+        needed,
+        lambda: _search(query, pool_size, filters),
+        # Partial results are not worth reusing
+        cacheable=lambda response: not response["missing_backends"],
+        fetch_k=pool_size
+    )
+    return _for_request(pool, query, top_k, offset)
+
+
+def _search(query: str, top_k: int, filters: Optional[SearchFilters] = None) -> dict:
+    """Run the vector and graph searches and fuse their top ``top_k`` candidates."""
     print(f"\nSearching for: {query}")
     
     # Simple intent detection without API call
-    packages = []
-    keywords = ["langchain", "openai", "pydantic", "fastapi", "streamlit", "transformers", "llama", "chroma", "pinecone"]
-    for word in keywords:
-        if word.lower() in query.lower():
-            packages.append(word)
+    packages = package_detector.detect(query)
+    filters = merge_filters(parse_filters(query), filters)
     
     is_compatibility = any(x in query.lower() for x in ["works with", "compatible", "for", "with"])
     
     print(f"  Intent: {'Compatibility' if is_compatibility else 'Semantic'}")
     if packages:
         print(f"  Detected packages: {packages}")
-    
-    # Vector search
-    print("  Running vector search...")
-    vector_results = pinecone_client.search(query, top_k=top_k)
-    
-    # Graph search for dependencies
-    graph_results = []
+    if not filters.is_empty():
+        print(f"  Filters: {filters.model_dump(exclude_defaults=True)}")
+    
+    # Vector and graph searches run concurrently, each bounded by its own timeout
+    print("  Running vector and graph search...")
+    started = time.monotonic()
+    vector_future = _executor.submit(pinecone_client.search, query, top_k=top_k, filter_dict=vector_filter(filters))
+    graph_future = None
+    if filters.depends_on:
+        # Required dependencies restrict the graph side to repos using all of them
+        packages, require_all = filters.depends_on, True
+    else:
+        # "langchain and pinecone" asks for repos using every package, otherwise any of them
+        require_all = len(packages) > 1 and any(x in query.lower().split() for x in ["and", "both", "&"])
     if packages:
-        print(f"  Running graph search...")
-        for package in packages:
-            graph_results.extend(
-                neo4j_client.find_repos_depending_on(package, limit=top_k)
-            )
+        graph_future = _executor.submit(
+            neo4j_client.find_repos_depending_on_packages,
+            packages,
+            require_all=require_all,
+            limit=top_k,
+            filters=filters
+        )
+    
+    missing = []
+    vector_results = _collect(vector_future, started + settings.SEARCH_VECTOR_TIMEOUT, "vector", missing)
+    graph_results = []
+    if graph_future is not None:
+        graph_results = _collect(graph_future, started + settings.SEARCH_GRAPH_TIMEOUT, "graph", missing)
     
     # Combine results
     print("  Combining results...")
-    all_results = {}
-    
-    for repo in vector_results:
-        all_results[repo.full_name] = repo
-    
-    for repo in graph_results:
-        if repo.full_name in all_results:
-            all_results[repo.full_name].score += 0.5
-        else:
-            all_results[repo.full_name] = repo
+    final_results = fuse(vector_results, graph_results, top_k)
     
-    final_results = sorted(
-        all_results.values(),
-        key=lambda x: x.score,
-        reverse=True
-    )[:top_k]
-    
-    # Simple explanation without API call
-    if final_results:
-        top_repo = final_results[0]
-        explanation = f"Found {len(final_results)} repositories matching '{query}'. Top result: {top_repo.name} with {top_repo.stars:,} stars."
-    else:
-        explanation = f"No repositories found matching '{query}'."
+    explanation = _explain(query, final_results)
     
     print("  Search complete!\n")
     
-    result = {
+    return {
         "query": query,
         "results": final_results,
         "explanation": explanation,
-        "search_strategy": "hybrid" if is_compatibility else "semantic"
+        "search_strategy": "hybrid" if is_compatibility else "semantic",
+        "filters": filters.model_dump(exclude_defaults=True),
+        "missing_backends": sorted(set(missing)),
+        # Neither backend filled its quota, so a bigger pool would not find more
+        "exhausted": len(vector_results) < top_k and len(graph_results) < top_k
     }
-    
-    # Save to cache
-    _cache[cache_key] = (time.time(), result)
-    
-    return result
+
+
+def warmup(path: Optional[str] = None, limit: Optional[int] = None) -> int:
+    """Precompute query embeddings for the most frequent queries listed in ``path``."""
+    path = path or settings.SEARCH_WARMUP_QUERIES_PATH
+    if not path or not Path(path).exists():
+        return 0
+    
+    with open(path) as f:
+        queries = [line.strip() for line in f if line.strip()]
+    try:
+        warmed = pinecone_client.warm_query_embeddings(queries[:limit or settings.SEARCH_WARMUP_LIMIT])
+    except Exception as e:
+        print(f"Query embedding warmup failed: {e}")
+        return 0
+    print(f"Warmed {warmed} query embeddings")
+    return warmed
 
 
 def format_results(search_response: dict) -> str:
@@ -97,11 +159,13 @@ def format_results(search_response: dict) -> str:
     output = []
     output.append(f"Search: {search_response['query']}")
     output.append(f"Strategy: {search_response['search_strategy']}")
+    if search_response.get('missing_backends'):
+        output.append(f"Partial results: {', '.join(search_response['missing_backends'])} unavailable")
     output.append(f"\n{search_response['explanation']}\n")
     output.append("=" * 60)
     output.append("\nTop Results:\n")
     
-    for i, repo in enumerate(search_response['results'], 1):
+    for i, repo in enumerate(search_response['results'], search_response.get('offset', 0) + 1):
         output.append(f"{i}. {repo.name}")
         output.append(f"   {repo.stars:,} stars | {repo.url}")
         if repo.description:
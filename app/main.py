@@ -10,7 +10,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import streamlit as st
-from agent.search import search_repos
+from agent.search import search_repos, warmup
 
 # Page config
 st.set_page_config(
@@ -19,6 +19,13 @@ st.set_page_config(
     layout="wide"
 )
 
+# Precompute embeddings for frequent queries once per server process, not per rerun
+@st.cache_resource
+def _warm_query_embeddings() -> int:
+    return warmup()
+
+_warm_query_embeddings()
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -65,20 +72,23 @@ query = st.text_input(
 
 # Number of results slider
 top_k = st.slider("Number of results", min_value=1, max_value=10, value=5)
+page = st.number_input("Page", min_value=1, value=1, step=1)
 
 # Search button
 if st.button("Search", type="primary") or query:
     if query:
         with st.spinner("Searching..."):
             try:
-                response = search_repos(query, top_k=top_k)
+                response = search_repos(query, top_k=top_k, offset=(page - 1) * top_k)
                 
                 st.success(f"**{response['explanation']}**")
                 st.info(f"**Search Strategy:** {response['search_strategy'].title()}")
+                if response.get('missing_backends'):
+                    st.warning(f"Partial results: {', '.join(response['missing_backends'])} search unavailable")
                 
                 st.markdown("### Top Results")
                 
-                for i, repo in enumerate(response['results'], 1):
+                for i, repo in enumerate(response['results'], response['offset'] + 1):
                     with st.container():
                         col1, col2 = st.columns([4, 1])
                         
@@ -96,6 +106,9 @@ if st.button("Search", type="primary") or query:
                         
                         st.divider()
                 
+                if not response['has_more']:
+                    st.caption(f"End of results ({response['total_candidates']} candidates)")
+                
             except Exception as e:
                 st.error(f"Error: {str(e)}")
     else:
@@ -0,0 +1,117 @@
+"""
+Benchmark dependency lookups on a synthetic graph: substring scan vs the package index.
+
+By default the graph is built in the embedded LocalGraphClient, so no server is
+needed. With ``--neo4j`` it is written to the Neo4j instance from settings and the
+old ``CONTAINS`` Cypher query is timed against the indexed ``package`` lookup.
+Use a throwaway database for that: the synthetic nodes are not cleaned up.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Keep the db package from connecting to remote backends on import; --neo4j builds its own client
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ.setdefault("GRAPH_BACKEND", "local")
+os.environ.setdefault("LOCAL_GRAPH_PATH", "")
+
+from db.local_graph import LocalGraphClient
+
+
+PACKAGES = 10000
+DEPS_PER_REPO = 3
+QUERIES = 50
+WRITE_CHUNK = 50000
+
+LEGACY_QUERY = """
+    MATCH (r:Repository)-[:DEPENDS_ON]->(dep:Repository)
+    WHERE dep.full_name CONTAINS $dependency
+       OR dep.name = $dependency
+    RETURN r.full_name as full_name
+    ORDER BY r.stars DESC
+    LIMIT $limit
+"""
+
+
+def build_graph(client, nodes: int) -> None:
+    """Write ``PACKAGES`` dependency targets plus repos that depend on a few of them each."""
+    rng = random.Random(0)
+    repos = nodes - PACKAGES
+    started = time.perf_counter()
+    
+    client.create_repo_nodes([(f"pypi/pkg_{i}", {"name": f"pkg_{i}", "stars": i}) for i in range(PACKAGES)])
+    for start in range(0, repos, WRITE_CHUNK):
+        chunk = range(start, min(start + WRITE_CHUNK, repos))
+        client.create_repo_nodes([(f"owner{i}/repo{i}", {"name": f"repo{i}", "stars": i % 5000}) for i in chunk])
+        client.create_dependencies([
+            (f"owner{i}/repo{i}", f"pypi/pkg_{rng.randrange(PACKAGES)}")
+            for i in chunk
+            for _ in range(DEPS_PER_REPO)
+        ])
+    
+    print(f"Built {nodes:,} nodes, ~{repos * DEPS_PER_REPO:,} edges in {time.perf_counter() - started:.1f}s\n")
+
+
+def summarize(label: str, samples: list) -> None:
+    """Print latency percentiles in milliseconds."""
+    samples = sorted(s * 1000 for s in samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:28} mean {statistics.mean(samples):9.3f}ms  p50 {statistics.median(samples):9.3f}ms  p95 {p95:9.3f}ms")
+
+
+def timed(lookup, names: list) -> list:
+    samples = []
+    for name in names:
+        started = time.perf_counter()
+        lookup(name)
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def legacy_local_lookup(graph: LocalGraphClient, dependency: str) -> list:
+    """The old matching rule (name equality or full_name substring) as a full node scan."""
+    targets = [
+        node for node, (full_name, name) in enumerate(zip(graph.full_names, graph.names))
+        if dependency in full_name or name == dependency
+    ]
+    graph._compile()
+    indptr, indices = graph._reverse
+    return [indices[indptr[t]:indptr[t + 1]] for t in targets]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--nodes", type=int, default=1_000_000)
+    parser.add_argument("--neo4j", action="store_true", help="benchmark against the configured Neo4j server")
+    args = parser.parse_args()
+    
+    names = [f"pkg_{random.Random(i).randrange(PACKAGES)}" for i in range(QUERIES)]
+    
+    if args.neo4j:
+        from db.neo4j_client import Neo4jClient
+        
+        client = Neo4jClient()
+        client.create_constraints()
+        build_graph(client, args.nodes)
+        with client.driver.session() as session:
+            legacy = timed(lambda name: session.run(LEGACY_QUERY, dependency=name, limit=10).data(), names)
+        summarize("CONTAINS scan", legacy)
+        summarize("package index", timed(lambda name: client.find_repos_depending_on(name), names))
+        client.close()
+    else:
+        graph = LocalGraphClient()
+        build_graph(graph, args.nodes)
+        graph._compile()
+        summarize("substring scan", timed(lambda name: legacy_local_lookup(graph, name), names[:5]))
+        summarize("package index", timed(lambda name: graph.find_repos_depending_on(name), names))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark per-request latency of a fresh httpx client vs the pooled GitHubFetcher.
+
+Runs against a local keep-alive HTTP server that mimics the GitHub repo endpoint,
+so no token or network access is needed.
+"""
+
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# No response cache: cache=None falls back to GITHUB_CACHE_PATH, which would add SQLite I/O per request
+os.environ["GITHUB_CACHE_PATH"] = ""
+
+from ingestion.github_fetcher import GitHubFetcher
+from ingestion.rate_limiter import RateLimitScheduler
+
+
+REQUESTS = 300
+
+# Far above REQUESTS, so pacing never delays a request
+UNTHROTTLED = 1e9
+
+REPO_PAYLOAD = json.dumps({
+    "full_name": "octo/repo",
+    "name": "repo",
+    "description": "Mock repository",
+    "stargazers_count": 1234,
+    "forks_count": 56,
+    "language": "Python",
+    "html_url": "https://github.com/octo/repo",
+    "owner": {"login": "octo"},
+    "topics": ["mock"],
+}).encode()
+
+
+class MockGitHubHandler(BaseHTTPRequestHandler):
+    """Serve the same repo payload for every GET, keeping connections alive."""
+    
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(REPO_PAYLOAD)))
+        self.end_headers()
+        self.wfile.write(REPO_PAYLOAD)
+    
+    def log_message(self, *args):
+        pass
+
+
+def summarize(label: str, samples: list) -> None:
+    """Print latency percentiles in milliseconds."""
+    samples = sorted(s * 1000 for s in samples)
+    p95 = samples[int(len(samples) * 0.95) - 1]
+    print(f"{label:28} mean {statistics.mean(samples):6.2f}ms  p50 {statistics.median(samples):6.2f}ms  p95 {p95:6.2f}ms")
+
+
+def bench_fresh_client(base_url: str) -> list:
+    """Old behaviour: a new client (and connection) per request."""
+    samples = []
+    for _ in range(REQUESTS):
+        started = time.perf_counter()
+        with httpx.Client() as client:
+            client.get(f"{base_url}/repos/octo/repo").json()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_pooled_fetcher(base_url: str) -> list:
+    """New behaviour: one pooled keep-alive client owned by the fetcher.
+    
+    Rate limiting and the response cache are disabled so only connection reuse is measured.
+    """
+    samples = []
+    scheduler = RateLimitScheduler(max_rate=UNTHROTTLED, burst=int(UNTHROTTLED))
+    with GitHubFetcher(base_url=base_url, http2=False, scheduler=scheduler, cache=None) as fetcher:
+        for _ in range(REQUESTS):
+            started = time.perf_counter()
+            fetcher.fetch_repo("octo", "repo")
+            samples.append(time.perf_counter() - started)
+    return samples
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGitHubHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    print(f"{REQUESTS} requests against {base_url}\n")
+    summarize("fresh client per request", bench_fresh_client(base_url))
+    summarize("pooled GitHubFetcher", bench_pooled_fetcher(base_url))
+    
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Check that the GraphQL batch fetch returns exactly what the per-repo REST calls do.
+
+A local stub server replays recorded REST and GraphQL responses, so no token or
+network access is needed. The fixture covers a missing repo and repos whose README
+is only found at a fallback path (README.rst, README).
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Every request must reach the stub, not a response cached by an earlier run
+os.environ["GITHUB_CACHE_PATH"] = ""
+
+from ingestion.github_fetcher import GitHubFetcher
+from ingestion.rate_limiter import RateLimitScheduler
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "github_batch.json"
+
+# Far above the handful of requests made, so pacing never delays one
+UNTHROTTLED = 1e9
+
+
+def load_fixture() -> dict:
+    with open(FIXTURE) as f:
+        return json.load(f)
+
+
+def make_handler(fixture: dict):
+    """Handler class replaying ``fixture``: REST responses by path, one GraphQL response."""
+    
+    class RecordedGitHubHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def _reply(self, status: int, body) -> None:
+            raw = body if isinstance(body, str) else json.dumps(body)
+            payload = raw.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "text/plain" if isinstance(body, str) else "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def do_GET(self):
+            recorded = fixture["rest"].get(self.path)
+            if recorded is None:
+                self._reply(404, {"message": "Not Found"})
+            else:
+                self._reply(recorded["status"], recorded["body"])
+        
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            variables = request["variables"]
+            asked = [f"{variables[f'o{i}']}/{variables[f'n{i}']}" for i in range(len(variables) // 2)]
+            if self.path != "/graphql" or asked != fixture["repos"]:
+                # The recording only answers the exact batch it was made for
+                self._reply(400, {"message": f"Unrecorded GraphQL batch: {asked}"})
+            else:
+                self._reply(200, fixture["graphql"])
+        
+        def log_message(self, *args):
+            pass
+    
+    return RecordedGitHubHandler
+
+
+def rest_results(fetcher: GitHubFetcher, full_names: list) -> dict:
+    """What the per-repo REST methods return, in the batch result shape."""
+    results = {}
+    for full_name in full_names:
+        owner, repo = full_name.split("/")
+        repo_data = fetcher.fetch_repo(owner, repo)
+        if repo_data is None:
+            continue
+        results[full_name] = {
+            "repo": repo_data,
+            "readme": fetcher.fetch_readme(owner, repo),
+            "dependencies": fetcher.fetch_dependencies(owner, repo),
+        }
+    return results
+
+
+async def fetch_batch_async(fetcher: GitHubFetcher, full_names: list) -> dict:
+    """The async batch path, closing its client inside the event loop that opened it."""
+    try:
+        return await fetcher.fetch_repos_batch_async(full_names)
+    finally:
+        await fetcher.aclose()
+
+
+def compare(label: str, expected: dict, actual: dict) -> bool:
+    """Print every difference between two result maps; returns True when they match."""
+    ok = True
+    for full_name in sorted(set(expected) | set(actual)):
+        if full_name not in actual:
+            print(f"  {label}: {full_name} missing from batch result")
+            ok = False
+        elif full_name not in expected:
+            print(f"  {label}: {full_name} in batch result but not found over REST")
+            ok = False
+        else:
+            for part, value in expected[full_name].items():
+                if actual[full_name][part] != value:
+                    print(f"  {label}: {full_name} {part} differs\n    rest:  {value!r:.200}\n    batch: {actual[full_name][part]!r:.200}")
+                    ok = False
+    print(f"{label:24} {'ok' if ok else 'MISMATCH'} ({len(actual)} repos)")
+    return ok
+
+
+def main():
+    fixture = load_fixture()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(fixture))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    
+    full_names = fixture["repos"]
+    print(f"{len(full_names)} recorded repos served from {base_url}\n")
+    scheduler = RateLimitScheduler(max_rate=UNTHROTTLED, burst=int(UNTHROTTLED))
+    with GitHubFetcher(base_url=base_url, http2=False, scheduler=scheduler, cache=None) as fetcher:
+        expected = rest_results(fetcher, full_names)
+        print()
+        ok = compare("fetch_repos_batch", expected, fetcher.fetch_repos_batch(full_names))
+        ok = compare("fetch_repos_batch_async", expected, asyncio.run(fetch_batch_async(fetcher, full_names))) and ok
+    
+    server.shutdown()
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Offline evaluation of result fusion: ranking quality and latency on a fixed query set.
+
+Each fixture query holds recorded vector and graph results plus graded relevance
+judgements, so no API keys or databases are needed.
+"""
+
+import json
+import math
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Offline: keep the db package from connecting to remote backends on import
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ.setdefault("GRAPH_BACKEND", "local")
+os.environ.setdefault("LOCAL_GRAPH_PATH", "")
+
+from agent.fusion import fuse
+from db.schemas import RepoResult
+
+
+FIXTURE = Path(__file__).parent / "fixtures" / "fusion_queries.json"
+LATENCY_ROUNDS = 2000
+
+
+def legacy_combine(vector_results, graph_results, top_k):
+    """The combiner fusion replaced: +0.5 for graph overlap, graph-only hits at 1.0."""
+    combined = {repo.full_name: repo.model_copy() for repo in vector_results}
+    for repo in graph_results:
+        if repo.full_name in combined:
+            combined[repo.full_name].score += 0.5
+        else:
+            combined[repo.full_name] = repo.model_copy(update={"score": 1.0})
+    return sorted(combined.values(), key=lambda repo: repo.score, reverse=True)[:top_k]
+
+
+def ndcg(ranked, relevant, k):
+    gains = [relevant.get(repo.full_name, 0) for repo in ranked[:k]]
+    dcg = sum((2 ** gain - 1) / math.log2(i + 2) for i, gain in enumerate(gains))
+    ideal = sorted(relevant.values(), reverse=True)[:k]
+    idcg = sum((2 ** gain - 1) / math.log2(i + 2) for i, gain in enumerate(ideal))
+    return dcg / idcg if idcg else 0.0
+
+
+def reciprocal_rank(ranked, relevant):
+    for i, repo in enumerate(ranked, 1):
+        if relevant.get(repo.full_name, 0) >= 2:
+            return 1.0 / i
+    return 0.0
+
+
+def recall(ranked, relevant, k):
+    found = sum(1 for repo in ranked[:k] if repo.full_name in relevant)
+    return found / len(relevant)
+
+
+def load_queries():
+    with open(FIXTURE) as f:
+        fixture = json.load(f)
+    
+    queries = []
+    for entry in fixture["queries"]:
+        vector = [RepoResult(name=r["full_name"].split("/")[-1], **r) for r in entry["vector"]]
+        graph = [RepoResult(name=r["full_name"].split("/")[-1], score=1.0, **r) for r in entry["graph"]]
+        # The graph backends return hits by match count, then stars
+        graph.sort(key=lambda repo: (-repo.match_count, -repo.stars))
+        queries.append((entry["query"], vector, graph, entry["relevant"]))
+    return fixture["top_k"], queries
+
+
+def main():
+    top_k, queries = load_queries()
+    combiners = {
+        "legacy +0.5": legacy_combine,
+        "rrf": lambda v, g, k: fuse(v, g, k, method="rrf", star_prior=0.0),
+        "rrf + stars": lambda v, g, k: fuse(v, g, k, method="rrf", star_prior=0.2),
+        "weighted": lambda v, g, k: fuse(v, g, k, method="weighted", star_prior=0.0),
+        "weighted + stars": lambda v, g, k: fuse(v, g, k, method="weighted", star_prior=0.2),
+    }
+    
+    print(f"{len(queries)} queries, top_k={top_k}\n")
+    print(f"{'combiner':18} {'nDCG@k':>8} {'MRR':>8} {'recall@k':>9} {'latency':>10}")
+    for label, combine in combiners.items():
+        ndcgs, rrs, recalls = [], [], []
+        for _, vector, graph, relevant in queries:
+            ranked = combine(vector, graph, top_k)
+            ndcgs.append(ndcg(ranked, relevant, top_k))
+            rrs.append(reciprocal_rank(ranked, relevant))
+            recalls.append(recall(ranked, relevant, top_k))
+        
+        started = time.perf_counter()
+        for i in range(LATENCY_ROUNDS):
+            _, vector, graph, _ = queries[i % len(queries)]
+            combine(vector, graph, top_k)
+        latency_us = (time.perf_counter() - started) / LATENCY_ROUNDS * 1e6
+        
+        print(
+            f"{label:18} {statistics.mean(ndcgs):8.3f} {statistics.mean(rrs):8.3f} "
+            f"{statistics.mean(recalls):9.3f} {latency_us:8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
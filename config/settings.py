@@ -14,16 +14,92 @@ class Settings:
     GOOGLE_API_KEY: str = os.getenv("GOOGLE_API_KEY", "")
     GEMINI_MODEL: str = "gemini-2.0-flash"
     EMBEDDING_MODEL: str = "models/text-embedding-004"
+    EMBED_BATCH_SIZE: int = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+    EMBED_BATCH_MAX_CHARS: int = int(os.getenv("EMBED_BATCH_MAX_CHARS", "200000"))
+    EMBEDDING_CACHE_PATH: str = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.f32")
+    EMBEDDING_CACHE_MEMORY_ITEMS: int = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+    QUERY_EMBEDDING_CACHE_ITEMS: int = int(os.getenv("QUERY_EMBEDDING_CACHE_ITEMS", "2048"))
     
     PINECONE_API_KEY: str = os.getenv("PINECONE_API_KEY", "")
     PINECONE_INDEX_NAME: str = os.getenv("PINECONE_INDEX_NAME", "gitgraph-index")
     PINECONE_DIMENSION: int = 768
+    PINECONE_UPSERT_BATCH_SIZE: int = int(os.getenv("PINECONE_UPSERT_BATCH_SIZE", "100"))
+    PINECONE_UPSERT_MAX_BYTES: int = int(os.getenv("PINECONE_UPSERT_MAX_BYTES", str(2 * 1024 * 1024)))
+    
+    # "pinecone" or "local" (in-process NumPy index)
+    VECTOR_BACKEND: str = os.getenv("VECTOR_BACKEND", "pinecone")
+    LOCAL_VECTOR_PATH: str = os.getenv("LOCAL_VECTOR_PATH", ".cache/vectors")
+    LOCAL_VECTOR_APPROXIMATE: bool = os.getenv("LOCAL_VECTOR_APPROXIMATE", "false").lower() == "true"
+    LOCAL_VECTOR_NPROBE: int = int(os.getenv("LOCAL_VECTOR_NPROBE", "8"))
     
     NEO4J_URI: str = os.getenv("NEO4J_URI", "")
     NEO4J_USER: str = os.getenv("NEO4J_USER", "neo4j")
     NEO4J_PASSWORD: str = os.getenv("NEO4J_PASSWORD", "")
+    # Rows per UNWIND write transaction
+    NEO4J_WRITE_BATCH_SIZE: int = int(os.getenv("NEO4J_WRITE_BATCH_SIZE", "1000"))
+    
+    # "neo4j" or "local" (embedded in-process graph)
+    GRAPH_BACKEND: str = os.getenv("GRAPH_BACKEND", "neo4j")
+    LOCAL_GRAPH_PATH: str = os.getenv("LOCAL_GRAPH_PATH", ".cache/graph")
     
     GITHUB_TOKEN: str = os.getenv("GITHUB_TOKEN", "")
+    GITHUB_HTTP2: bool = os.getenv("GITHUB_HTTP2", "true").lower() == "true"
+    GITHUB_MAX_CONNECTIONS: int = int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+    GITHUB_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("GITHUB_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    GITHUB_TIMEOUT: float = float(os.getenv("GITHUB_TIMEOUT", "30"))
+    GITHUB_MAX_REQUESTS_PER_SECOND: float = float(os.getenv("GITHUB_MAX_REQUESTS_PER_SECOND", "10"))
+    GITHUB_BURST: int = int(os.getenv("GITHUB_BURST", "20"))
+    GITHUB_MAX_RETRIES: int = int(os.getenv("GITHUB_MAX_RETRIES", "6"))
+    GITHUB_GRAPHQL_BATCH_SIZE: int = int(os.getenv("GITHUB_GRAPHQL_BATCH_SIZE", "50"))
+    GITHUB_CACHE_PATH: str = os.getenv("GITHUB_CACHE_PATH", ".cache/github_responses.sqlite")
+    GITHUB_CACHE_MAX_BYTES: int = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    GITHUB_CACHE_MAX_AGE: float = float(os.getenv("GITHUB_CACHE_MAX_AGE", "0"))
+    
+    # Seconds a writer waits for another process's lock on any local SQLite store
+    SQLITE_BUSY_TIMEOUT: float = float(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+    
+    INGEST_FETCH_CONCURRENCY: int = int(os.getenv("INGEST_FETCH_CONCURRENCY", "8"))
+    INGEST_EMBED_CONCURRENCY: int = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+    INGEST_WRITE_CONCURRENCY: int = int(os.getenv("INGEST_WRITE_CONCURRENCY", "4"))
+    INGEST_BATCH_LINGER_SECONDS: float = float(os.getenv("INGEST_BATCH_LINGER_SECONDS", "0.5"))
+    # Fingerprints of ingested repos, used by incremental re-ingestion
+    INGEST_MANIFEST_PATH: str = os.getenv("INGEST_MANIFEST_PATH", ".cache/ingest_manifest.sqlite")
+    # Resumable job queue shared by every ingestion worker process
+    INGEST_JOB_PATH: str = os.getenv("INGEST_JOB_PATH", ".cache/ingest_jobs.sqlite")
+    INGEST_CLAIM_BATCH: int = int(os.getenv("INGEST_CLAIM_BATCH", "50"))
+    INGEST_LEASE_SECONDS: float = float(os.getenv("INGEST_LEASE_SECONDS", "300"))
+    INGEST_MAX_ATTEMPTS: int = int(os.getenv("INGEST_MAX_ATTEMPTS", "5"))
+    INGEST_RETRY_BASE_SECONDS: float = float(os.getenv("INGEST_RETRY_BASE_SECONDS", "30"))
+    INGEST_RETRY_MAX_SECONDS: float = float(os.getenv("INGEST_RETRY_MAX_SECONDS", "1800"))
+    # Worker processes for --workers; each gets its own HTTP client and database sessions
+    INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", "1"))
+    INGEST_SHARD_SIZE: int = int(os.getenv("INGEST_SHARD_SIZE", "200"))
+    INGEST_PROGRESS_SECONDS: float = float(os.getenv("INGEST_PROGRESS_SECONDS", "10"))
+    
+    # Seconds search_repos waits on each backend before returning partial results
+    SEARCH_VECTOR_TIMEOUT: float = float(os.getenv("SEARCH_VECTOR_TIMEOUT", "5"))
+    SEARCH_GRAPH_TIMEOUT: float = float(os.getenv("SEARCH_GRAPH_TIMEOUT", "2"))
+    SEARCH_MAX_WORKERS: int = int(os.getenv("SEARCH_MAX_WORKERS", "8"))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+    SEARCH_CACHE_TTL: float = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+    # SQLite file shared by all app workers on a host; empty disables the shared tier
+    SEARCH_SHARED_CACHE_PATH: str = os.getenv("SEARCH_SHARED_CACHE_PATH", "")
+    SEARCH_CACHE_LEASE_SECONDS: float = float(os.getenv("SEARCH_CACHE_LEASE_SECONDS", "10"))
+    SEARCH_CACHE_POLL_SECONDS: float = float(os.getenv("SEARCH_CACHE_POLL_SECONDS", "0.05"))
+    # Backends are asked for this multiple of top_k; the fused pool is cached for later pages
+    SEARCH_CANDIDATE_MULTIPLIER: int = int(os.getenv("SEARCH_CANDIDATE_MULTIPLIER", "4"))
+    SEARCH_MAX_CANDIDATES: int = int(os.getenv("SEARCH_MAX_CANDIDATES", "100"))
+    # Result fusion: "rrf" (reciprocal rank) or "weighted" (normalized scores)
+    SEARCH_FUSION: str = os.getenv("SEARCH_FUSION", "rrf")
+    SEARCH_RRF_K: float = float(os.getenv("SEARCH_RRF_K", "60"))
+    SEARCH_VECTOR_WEIGHT: float = float(os.getenv("SEARCH_VECTOR_WEIGHT", "1.0"))
+    SEARCH_GRAPH_WEIGHT: float = float(os.getenv("SEARCH_GRAPH_WEIGHT", "1.0"))
+    SEARCH_STAR_PRIOR: float = float(os.getenv("SEARCH_STAR_PRIOR", "0.0"))
+    # One query per line, most frequent first; their embeddings are precomputed at startup
+    SEARCH_WARMUP_QUERIES_PATH: str = os.getenv("SEARCH_WARMUP_QUERIES_PATH", "")
+    SEARCH_WARMUP_LIMIT: int = int(os.getenv("SEARCH_WARMUP_LIMIT", "200"))
+    # How often the query package detector picks up packages newly added to the graph
+    SEARCH_PACKAGE_REFRESH_SECONDS: float = float(os.getenv("SEARCH_PACKAGE_REFRESH_SECONDS", "300"))
     
     PROJECT_NAME: str = "GitGraph RAG"
     VERSION: str = "0.1.0"
@@ -1,12 +1,13 @@
 """Database clients package."""
 
-from .schemas import RepoMetadata, RepoResult, GitGraphState
+from .schemas import RepoMetadata, RepoResult, SearchFilters, GitGraphState
 from .pinecone_client import pinecone_client
 from .neo4j_client import neo4j_client
 
 __all__ = [
     "RepoMetadata",
     "RepoResult",
+    "SearchFilters",
     "GitGraphState",
     "pinecone_client",
     "neo4j_client",
@@ -0,0 +1,115 @@
+"""Content-addressed embedding cache with an in-memory LRU over a memory-mapped disk tier."""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+def embedding_key(model: str, task_type: str, text: str) -> bytes:
+    """16-byte digest identifying one (model, task_type, text) embedding."""
+    return hashlib.blake2b(f"{model}\0{task_type}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+
+class EmbeddingCache:
+    """Two-tier embedding cache.
+    
+    The memory tier is an LRU of float32 arrays. The disk tier is one append-only
+    file of fixed-size ``(key, float32[dimension])`` records, read through a
+    memory map; appends from other processes are picked up on the next miss.
+    """
+    
+    def __init__(self, path: Optional[str], dimension: int, max_memory_items: int = 10000):
+        self.path = Path(path) if path else None
+        self.dimension = dimension
+        self.max_memory_items = max_memory_items
+        self.record = np.dtype([("key", "V16"), ("vector", "<f4", (dimension,))])
+        
+        self._memory: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+        self._rows: Dict[bytes, int] = {}
+        self._map: Optional[np.memmap] = None
+        self._lock = threading.Lock()
+        
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+    
+    def _refresh_disk_index(self) -> None:
+        """Map any records appended since the last look (by us or another process)."""
+        if self.path is None or not self.path.exists():
+            return
+        
+        count = self.path.stat().st_size // self.record.itemsize
+        mapped = 0 if self._map is None else len(self._map)
+        if count == mapped:
+            return
+        
+        self._map = np.memmap(self.path, dtype=self.record, mode="r", shape=(count,))
+        keys = np.ascontiguousarray(self._map["key"][mapped:count]).tobytes()
+        for i in range(count - mapped):
+            self._rows[keys[i * 16:(i + 1) * 16]] = mapped + i
+    
+    def _remember(self, key: bytes, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_items:
+            self._memory.popitem(last=False)
+    
+    def get(self, key: bytes) -> Optional[List[float]]:
+        """Return the cached embedding for ``key`` or None."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector.tolist()
+            
+            if key not in self._rows:
+                self._refresh_disk_index()
+            row = self._rows.get(key)
+            if row is not None:
+                vector = np.array(self._map[row]["vector"])
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector.tolist()
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: bytes, embedding: List[float]) -> None:
+        """Store an embedding in memory and append it to the disk tier."""
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            self._remember(key, vector)
+            
+            if self.path is None or len(vector) != self.dimension:
+                return
+            self._refresh_disk_index()
+            if key in self._rows:
+                return
+            
+            record = np.zeros(1, dtype=self.record)
+            record["key"] = np.frombuffer(key, dtype="V16")
+            record["vector"] = vector
+            
+            # One O_APPEND write per record keeps concurrent writers from interleaving
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, record.tobytes())
+            finally:
+                os.close(fd)
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit counters per tier plus the overall hit rate."""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+        }
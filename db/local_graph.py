@@ -0,0 +1,329 @@
+"""Embedded graph backend with the same interface as Neo4jClient."""
+
+import json
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from db.packages import package_for
+from db.schemas import RepoResult, SearchFilters
+
+
+class LocalGraphClient:
+    """In-process repository graph.
+    
+    Nodes live in parallel arrays indexed by a dense node id, with a
+    ``full_name -> id`` index and a ``package -> ids`` index. DEPENDS_ON edges are
+    appended to an edge list and compiled lazily into forward and reverse CSR
+    adjacency the first time a query needs them.
+    """
+    
+    def __init__(self, path: Optional[str] = None):
+        self.path = Path(path) if path else None
+        self._lock = threading.RLock()
+        
+        self._ids: Dict[str, int] = {}
+        self._by_package: Dict[str, List[int]] = {}
+        self.full_names: List[str] = []
+        self.names: List[str] = []
+        self.packages: List[str] = []
+        self.descriptions: List[str] = []
+        self.urls: List[str] = []
+        self.topics: List[List[str]] = []
+        self.stars = np.zeros(0, dtype=np.int64)
+        self.forks = np.zeros(0, dtype=np.int64)
+        # Languages are interned so filtering is an integer comparison
+        self.languages: List[str] = [""]
+        self._language_codes: Dict[str, int] = {"": 0}
+        self.language = np.zeros(0, dtype=np.int32)
+        
+        self._edges: Dict[Tuple[int, int], str] = {}
+        # Target of every edge in creation order; its length is the package-name watermark
+        self._dependency_log: List[int] = []
+        self._csr_dirty = True
+        self._forward: Tuple[np.ndarray, np.ndarray] = (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        self._reverse: Tuple[np.ndarray, np.ndarray] = (np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int64))
+        
+        if self.path and (self.path / "graph.json").exists():
+            self._load()
+    
+    def close(self):
+        """Persist the graph to disk."""
+        if self.path:
+            self.save()
+    
+    def test_connection(self) -> bool:
+        """The embedded graph is always reachable."""
+        return True
+    
+    def create_constraints(self):
+        """Uniqueness is enforced by the full_name index; nothing to create."""
+        print("Local graph ready")
+    
+    def _node(self, full_name: str) -> int:
+        """Return the node id for ``full_name``, creating an empty node if needed."""
+        node = self._ids.get(full_name)
+        if node is not None:
+            return node
+        
+        node = len(self.full_names)
+        self._ids[full_name] = node
+        self.full_names.append(full_name)
+        self.names.append("")
+        self.descriptions.append("")
+        self.urls.append("")
+        self.topics.append([])
+        self.packages.append("")
+        self._set_package(node, package_for(full_name))
+        # CSR row pointers cover every node, so a new node invalidates them
+        self._csr_dirty = True
+        if node >= len(self.stars):
+            capacity = max(64, len(self.stars) * 2)
+            self.stars = np.resize(self.stars, capacity)
+            self.forks = np.resize(self.forks, capacity)
+            self.language = np.resize(self.language, capacity)
+        self.stars[node] = 0
+        self.forks[node] = 0
+        self.language[node] = 0
+        return node
+    
+    def _set_package(self, node: int, package: str) -> None:
+        old = self.packages[node]
+        if old == package:
+            return
+        if old:
+            self._by_package[old].remove(node)
+        self.packages[node] = package
+        self._by_package.setdefault(package, []).append(node)
+    
+    def _language_code(self, language: str) -> int:
+        code = self._language_codes.get(language)
+        if code is None:
+            code = len(self.languages)
+            self._language_codes[language] = code
+            self.languages.append(language)
+        return code
+    
+    def create_repo_node(self, full_name: str, metadata: Dict[str, Any]) -> None:
+        """Create or update a repository node."""
+        with self._lock:
+            node = self._node(full_name)
+            self.names[node] = metadata.get("name", "")
+            self._set_package(node, package_for(full_name, self.names[node]))
+            self.descriptions[node] = metadata.get("description", "") or ""
+            self.urls[node] = metadata.get("url", "")
+            self.topics[node] = list(metadata.get("topics", []))
+            self.stars[node] = metadata.get("stars", 0)
+            self.forks[node] = metadata.get("forks", 0)
+            self.language[node] = self._language_code(metadata.get("language", "") or "")
+    
+    def create_dependency(self, from_repo: str, to_repo: str, version: Optional[str] = None) -> None:
+        """Create a DEPENDS_ON relationship between repos."""
+        with self._lock:
+            # Neo4jClient MATCHes the source, so a missing source is a no-op
+            source = self._ids.get(from_repo)
+            if source is None:
+                return
+            target = self._node(to_repo)
+            if (source, target) not in self._edges:
+                self._csr_dirty = True
+                self._dependency_log.append(target)
+            self._edges[(source, target)] = version or ""
+    
+    def create_repo_nodes(self, repos: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Create or update many repository nodes from ``(full_name, metadata)`` pairs."""
+        with self._lock:
+            for full_name, metadata in repos:
+                self.create_repo_node(full_name, metadata)
+    
+    def create_dependencies(self, edges: List[Tuple]) -> None:
+        """Create many DEPENDS_ON relationships from ``(from_repo, to_repo[, version])`` tuples."""
+        with self._lock:
+            for edge in edges:
+                self.create_dependency(*edge)
+    
+    def prune_dependencies(self, repos: List[Tuple[str, List[str]]]) -> None:
+        """Delete DEPENDS_ON relationships from each repo to anything outside its current dependency list."""
+        with self._lock:
+            keep: Dict[int, set] = {}
+            for full_name, deps in repos:
+                source = self._ids.get(full_name)
+                if source is not None:
+                    keep[source] = {self._ids[dep] for dep in deps if dep in self._ids}
+            stale = [edge for edge in self._edges if edge[0] in keep and edge[1] not in keep[edge[0]]]
+            for edge in stale:
+                del self._edges[edge]
+            if stale:
+                self._csr_dirty = True
+    
+    def backfill_package_names(self) -> int:
+        """Packages are derived on every write and on load, so there is nothing to backfill."""
+        return 0
+    
+    def _compile(self) -> None:
+        """Rebuild forward and reverse CSR adjacency from the edge list."""
+        if not self._csr_dirty:
+            return
+        
+        count = len(self.full_names)
+        edges = np.array(list(self._edges), dtype=np.int64).reshape(-1, 2)
+        for attr, (src, dst) in (("_forward", (0, 1)), ("_reverse", (1, 0))):
+            order = np.argsort(edges[:, src], kind="stable")
+            indptr = np.zeros(count + 1, dtype=np.int64)
+            np.add.at(indptr, edges[:, src] + 1, 1)
+            setattr(self, attr, (np.cumsum(indptr), edges[order, dst]))
+        self._csr_dirty = False
+    
+    def _result(self, node: int, match_count: int = 0) -> RepoResult:
+        return RepoResult(
+            name=self.names[node],
+            full_name=self.full_names[node],
+            description=self.descriptions[node],
+            stars=int(self.stars[node]),
+            language=self.languages[self.language[node]] or None,
+            score=1.0,
+            url=self.urls[node],
+            match_count=match_count
+        )
+    
+    def _results(self, nodes: np.ndarray, limit: int) -> List[RepoResult]:
+        """Top ``limit`` nodes by stars as RepoResults."""
+        if limit <= 0:
+            return []
+        if len(nodes) > limit:
+            nodes = nodes[np.argpartition(-self.stars[nodes], limit - 1)[:limit]]
+        nodes = nodes[np.argsort(-self.stars[nodes], kind="stable")]
+        return [self._result(node) for node in nodes.tolist()]
+    
+    def find_repos_depending_on(self, dependency: str, limit: int = 10) -> List[RepoResult]:
+        """Find repositories that depend on a specific package."""
+        return self.find_repos_depending_on_packages([dependency], limit=limit)
+    
+    def find_repos_depending_on_packages(
+        self,
+        packages: List[str],
+        require_all: bool = False,
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None
+    ) -> List[RepoResult]:
+        """Find repositories depending on any (or all) of ``packages``, each once with a ``match_count``."""
+        package_names = {package_for(package) for package in packages}
+        if not package_names or limit <= 0:
+            return []
+        
+        with self._lock:
+            self._compile()
+            indptr, indices = self._reverse
+            # Dependents are deduplicated per package so counts are packages matched, not edges
+            per_package = [
+                np.unique(np.concatenate(
+                    [indices[indptr[t]:indptr[t + 1]] for t in self._by_package.get(package, [])] or [np.zeros(0, dtype=np.int64)]
+                ))
+                for package in package_names
+            ]
+            nodes, counts = np.unique(np.concatenate(per_package), return_counts=True)
+            
+            keep = (counts >= (len(package_names) if require_all else 1)) & self._filter_mask(nodes, filters)
+            nodes, counts = nodes[keep], counts[keep]
+            order = np.lexsort((-self.stars[nodes], -counts))[:limit]
+            return [self._result(node, match_count) for node, match_count in zip(nodes[order].tolist(), counts[order].tolist())]
+    
+    def _filter_mask(self, nodes: np.ndarray, filters: Optional[SearchFilters]) -> np.ndarray:
+        """Which of ``nodes`` pass the language, min_stars and topics filters."""
+        mask = np.ones(len(nodes), dtype=bool)
+        if filters is None:
+            return mask
+        if filters.language:
+            mask &= self.language[nodes] == self._language_codes.get(filters.language, -1)
+        if filters.min_stars:
+            mask &= self.stars[nodes] >= filters.min_stars
+        if filters.topics:
+            wanted = set(filters.topics)
+            mask &= np.array([bool(wanted.intersection(self.topics[node])) for node in nodes.tolist()], dtype=bool)
+        return mask
+    
+    def find_popular_repos(self, language: Optional[str] = None, min_stars: int = 100, limit: int = 10) -> List[RepoResult]:
+        """Find popular repositories."""
+        with self._lock:
+            count = len(self.full_names)
+            mask = self.stars[:count] >= min_stars
+            if language:
+                code = self._language_codes.get(language)
+                if code is None:
+                    return []
+                mask &= self.language[:count] == code
+            return self._results(np.flatnonzero(mask), limit)
+    
+    def package_names_since(self, since: Optional[int] = None) -> Tuple[List[str], int]:
+        """Package names depended on by edges created after watermark ``since`` (all if None), plus the new watermark."""
+        with self._lock:
+            targets = set(self._dependency_log[since or 0:])
+            return list({self.packages[node] for node in targets}), len(self._dependency_log)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get database statistics."""
+        with self._lock:
+            return {
+                "repos": len(self.full_names),
+                "dependencies": len(self._edges)
+            }
+    
+    def load_from(self, client) -> None:
+        """Snapshot every node and edge from a Neo4jClient, e.g. to serve hot reads locally."""
+        with self._lock:
+            self.create_repo_nodes(client.iter_repo_nodes())
+            self.create_dependencies(client.iter_dependencies())
+    
+    def save(self, path: Optional[str] = None) -> None:
+        """Write node arrays and the edge list to ``graph.npz`` + ``graph.json``."""
+        directory = Path(path) if path else self.path
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            count = len(self.full_names)
+            edges = np.array(list(self._edges), dtype=np.int64).reshape(-1, 2)
+            np.savez(
+                directory / "graph.npz",
+                stars=self.stars[:count],
+                forks=self.forks[:count],
+                language=self.language[:count],
+                edges=edges,
+            )
+            with open(directory / "graph.json", "w") as f:
+                json.dump({
+                    "full_names": self.full_names,
+                    "names": self.names,
+                    "descriptions": self.descriptions,
+                    "urls": self.urls,
+                    "topics": self.topics,
+                    "languages": self.languages,
+                    "versions": list(self._edges.values()),
+                }, f)
+    
+    def _load(self) -> None:
+        with open(self.path / "graph.json") as f:
+            saved = json.load(f)
+        arrays = np.load(self.path / "graph.npz")
+        
+        self.full_names = saved["full_names"]
+        self.names = saved["names"]
+        self.descriptions = saved["descriptions"]
+        self.urls = saved["urls"]
+        self.topics = saved.get("topics", [[] for _ in self.full_names])
+        self.languages = saved["languages"]
+        self._language_codes = {language: code for code, language in enumerate(self.languages)}
+        self._ids = {full_name: node for node, full_name in enumerate(self.full_names)}
+        self.packages = [""] * len(self.full_names)
+        for node, (full_name, name) in enumerate(zip(self.full_names, self.names)):
+            self._set_package(node, package_for(full_name, name))
+        
+        self.stars = arrays["stars"].copy()
+        self.forks = arrays["forks"].copy()
+        self.language = arrays["language"].copy()
+        self._edges = {
+            (int(source), int(target)): version
+            for (source, target), version in zip(arrays["edges"], saved["versions"])
+        }
+        self._dependency_log = [target for _, target in self._edges]
+        self._csr_dirty = True
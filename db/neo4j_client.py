@@ -1,12 +1,16 @@
 """Neo4j client for graph database operations."""
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from neo4j import GraphDatabase
 
 from config import settings
-from db.schemas import RepoResult
+from db.packages import package_for
+from db.schemas import RepoResult, SearchFilters
 
 
+# How far back package_names_since re-reads, for writes that committed after a later-stamped one
+_WATERMARK_OVERLAP_MS = 60000
+
 class Neo4jClient:
     """Wrapper for Neo4j graph database."""
     
@@ -37,60 +41,159 @@ class Neo4jClient:
                 CREATE CONSTRAINT repo_name IF NOT EXISTS
                 FOR (r:Repository) REQUIRE r.full_name IS UNIQUE
             """)
+            session.run("""
+                CREATE INDEX repo_package IF NOT EXISTS
+                FOR (r:Repository) ON (r.package)
+            """)
+            session.run("""
+                CREATE INDEX depends_on_created IF NOT EXISTS
+                FOR ()-[d:DEPENDS_ON]-() ON (d.created_at)
+            """)
             print("Neo4j constraints created")
     
     def create_repo_node(self, full_name: str, metadata: Dict[str, Any]) -> None:
         """Create or update a repository node."""
-        with self.driver.session() as session:
-            session.run("""
-                MERGE (r:Repository {full_name: $full_name})
-                SET r.name = $name,
-                    r.description = $description,
-                    r.stars = $stars,
-                    r.forks = $forks,
-                    r.language = $language,
-                    r.url = $url
-            """, 
-                full_name=full_name,
-                name=metadata.get("name", ""),
-                description=metadata.get("description", ""),
-                stars=metadata.get("stars", 0),
-                forks=metadata.get("forks", 0),
-                language=metadata.get("language", ""),
-                url=metadata.get("url", "")
-            )
+        self.create_repo_nodes([(full_name, metadata)])
     
     def create_dependency(self, from_repo: str, to_repo: str, version: Optional[str] = None) -> None:
         """Create a DEPENDS_ON relationship between repos."""
+        self.create_dependencies([(from_repo, to_repo, version)])
+    
+    def _write_rows(self, query: str, rows: List[Dict[str, Any]]) -> None:
+        """UNWIND ``rows`` through ``query`` in chunked, retried write transactions."""
+        if not rows:
+            return
+        batch_size = settings.NEO4J_WRITE_BATCH_SIZE
         with self.driver.session() as session:
-            session.run("""
-                MATCH (from:Repository {full_name: $from_repo})
-                MERGE (to:Repository {full_name: $to_repo})
-                MERGE (from)-[d:DEPENDS_ON]->(to)
-                SET d.version = $version
-            """,
-                from_repo=from_repo,
-                to_repo=to_repo,
-                version=version or ""
-            )
+            for start in range(0, len(rows), batch_size):
+                chunk = rows[start:start + batch_size]
+                session.execute_write(lambda tx: tx.run(query, rows=chunk).consume())
+    
+    def create_repo_nodes(self, repos: List[Tuple[str, Dict[str, Any]]]) -> None:
+        """Create or update many repository nodes from ``(full_name, metadata)`` pairs."""
+        self._write_rows("""
+            UNWIND $rows AS row
+            MERGE (r:Repository {full_name: row.full_name})
+            SET r.name = row.name,
+                r.description = row.description,
+                r.stars = row.stars,
+                r.forks = row.forks,
+                r.language = row.language,
+                r.url = row.url,
+                r.topics = row.topics,
+                r.package = row.package
+        """, [
+            {
+                "full_name": full_name,
+                "name": metadata.get("name", ""),
+                "description": metadata.get("description", ""),
+                "stars": metadata.get("stars", 0),
+                "forks": metadata.get("forks", 0),
+                "language": metadata.get("language", ""),
+                "url": metadata.get("url", ""),
+                "topics": metadata.get("topics", []),
+                "package": package_for(full_name, metadata.get("name", ""))
+            }
+            for full_name, metadata in repos
+        ])
+    
+    def create_dependencies(self, edges: List[Tuple]) -> None:
+        """Create many DEPENDS_ON relationships from ``(from_repo, to_repo[, version])`` tuples."""
+        self._write_rows("""
+            UNWIND $rows AS row
+            MATCH (from:Repository {full_name: row.from_repo})
+            MERGE (to:Repository {full_name: row.to_repo})
+            SET to.package = coalesce(to.package, row.package)
+            MERGE (from)-[d:DEPENDS_ON]->(to)
+            ON CREATE SET d.created_at = timestamp()
+            SET d.version = row.version
+        """, [
+            {
+                "from_repo": edge[0],
+                "to_repo": edge[1],
+                "package": package_for(edge[1]),
+                "version": (edge[2] if len(edge) > 2 else None) or ""
+            }
+            for edge in edges
+        ])
+    
+    def prune_dependencies(self, repos: List[Tuple[str, List[str]]]) -> None:
+        """Delete DEPENDS_ON relationships from each repo to anything outside its current dependency list."""
+        self._write_rows("""
+            UNWIND $rows AS row
+            MATCH (:Repository {full_name: row.full_name})-[d:DEPENDS_ON]->(to:Repository)
+            WHERE NOT to.full_name IN row.deps
+            DELETE d
+        """, [{"full_name": full_name, "deps": list(deps)} for full_name, deps in repos])
+    
+    def backfill_package_names(self) -> int:
+        """Set ``package`` on nodes written before it existed; returns how many were updated."""
+        updated = 0
+        while True:
+            with self.driver.session() as session:
+                records = session.run("""
+                    MATCH (r:Repository) WHERE r.package IS NULL
+                    RETURN r.full_name as full_name, r.name as name
+                    LIMIT $limit
+                """, limit=settings.NEO4J_WRITE_BATCH_SIZE).data()
+            if not records:
+                return updated
+            
+            self._write_rows("""
+                UNWIND $rows AS row
+                MATCH (r:Repository {full_name: row.full_name})
+                SET r.package = row.package
+            """, [
+                {"full_name": record["full_name"], "package": package_for(record["full_name"], record["name"] or "")}
+                for record in records
+            ])
+            updated += len(records)
     
     def find_repos_depending_on(self, dependency: str, limit: int = 10) -> List[RepoResult]:
         """Find repositories that depend on a specific package."""
+        return self.find_repos_depending_on_packages([dependency], limit=limit)
+    
+    def find_repos_depending_on_packages(
+        self,
+        packages: List[str],
+        require_all: bool = False,
+        limit: int = 10,
+        filters: Optional[SearchFilters] = None
+    ) -> List[RepoResult]:
+        """Find repositories depending on any (or all) of ``packages`` in one query.
+        
+        Each repo appears once, with ``match_count`` set to how many of the packages it uses.
+        ``filters`` (language, min_stars, topics) are applied to the dependents inside the query.
+        """
+        filters = filters or SearchFilters()
+        package_names = sorted({package_for(package) for package in packages})
+        if not package_names:
+            return []
+        
         with self.driver.session() as session:
             result = session.run("""
-                MATCH (r:Repository)-[:DEPENDS_ON]->(dep:Repository)
-                WHERE dep.full_name CONTAINS $dependency 
-                   OR dep.name = $dependency
+                MATCH (dep:Repository)<-[:DEPENDS_ON]-(r:Repository)
+                WHERE dep.package IN $packages
+                  AND ($language IS NULL OR r.language = $language)
+                  AND ($min_stars IS NULL OR r.stars >= $min_stars)
+                  AND (size($topics) = 0 OR any(topic IN coalesce(r.topics, []) WHERE topic IN $topics))
+                WITH r, count(DISTINCT dep.package) as match_count
+                WHERE match_count >= $required
                 RETURN r.full_name as full_name,
                        r.name as name,
                        r.description as description,
                        r.stars as stars,
                        r.language as language,
-                       r.url as url
-                ORDER BY r.stars DESC
+                       r.url as url,
+                       match_count
+                ORDER BY match_count DESC, r.stars DESC
                 LIMIT $limit
             """,
-                dependency=dependency,
+                packages=package_names,
+                required=len(package_names) if require_all else 1,
+                language=filters.language,
+                min_stars=filters.min_stars,
+                topics=filters.topics,
                 limit=limit
             )
             
@@ -103,7 +206,8 @@ class Neo4jClient:
                     stars=record["stars"],
                     language=record["language"],
                     score=1.0,
-                    url=record["url"]
+                    url=record["url"],
+                    match_count=record["match_count"]
                 ))
             
             return repos
@@ -151,6 +255,55 @@ class Neo4jClient:
             
             return repos
     
+    def iter_repo_nodes(self) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Yield ``(full_name, metadata)`` for every repository node."""
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (r:Repository)
+                RETURN r.full_name as full_name,
+                       r.name as name,
+                       r.description as description,
+                       r.stars as stars,
+                       r.forks as forks,
+                       r.language as language,
+                       r.url as url
+            """)
+            for record in result:
+                metadata = {key: record[key] for key in ("name", "description", "stars", "forks", "language", "url")}
+                yield record["full_name"], {key: value for key, value in metadata.items() if value is not None}
+    
+    def iter_dependencies(self) -> Iterator[Tuple[str, str, str]]:
+        """Yield ``(from_repo, to_repo, version)`` for every DEPENDS_ON edge."""
+        with self.driver.session() as session:
+            result = session.run("""
+                MATCH (from:Repository)-[d:DEPENDS_ON]->(to:Repository)
+                RETURN from.full_name as from_repo, to.full_name as to_repo, d.version as version
+            """)
+            for record in result:
+                yield record["from_repo"], record["to_repo"], record["version"] or ""
+    
+    def package_names_since(self, since: Optional[int] = None) -> Tuple[List[str], int]:
+        """Package names depended on by edges created after watermark ``since`` (all if None), plus the new watermark.
+        
+        The watermark is the server clock in milliseconds. Writes can commit out of
+        timestamp order, so each read reaches back ``_WATERMARK_OVERLAP_MS``.
+        """
+        with self.driver.session() as session:
+            now = session.run("RETURN timestamp() as now").single()["now"]
+            if since is None:
+                result = session.run("""
+                    MATCH (dep:Repository)<-[:DEPENDS_ON]-()
+                    WHERE dep.package IS NOT NULL
+                    RETURN DISTINCT dep.package as package
+                """)
+            else:
+                result = session.run("""
+                    MATCH (dep:Repository)<-[d:DEPENDS_ON]-()
+                    WHERE d.created_at > $since AND dep.package IS NOT NULL
+                    RETURN DISTINCT dep.package as package
+                """, since=since - _WATERMARK_OVERLAP_MS)
+            return [record["package"] for record in result], now
+    
     def get_stats(self) -> Dict[str, int]:
         """Get database statistics."""
         with self.driver.session() as session:
@@ -168,4 +321,8 @@ class Neo4jClient:
             }
 
 
-neo4j_client = Neo4jClient()
+if settings.GRAPH_BACKEND == "local":
+    from db.local_graph import LocalGraphClient
+    neo4j_client = LocalGraphClient(settings.LOCAL_GRAPH_PATH)
+else:
+    neo4j_client = Neo4jClient()
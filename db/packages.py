@@ -0,0 +1,16 @@
+"""Canonical package identities shared by the graph backends."""
+
+import re
+
+
+_SEPARATORS = re.compile(r"[-_.]+")
+
+
+def canonical_package_name(name: str) -> str:
+    """Normalize a package name PEP 503-style: lowercase, runs of ``-_.`` become ``-``."""
+    return _SEPARATORS.sub("-", name.strip()).lower()
+
+
+def package_for(full_name: str, name: str = "") -> str:
+    """Package identity of a graph node: its repo name, else the last ``/`` segment of its full name."""
+    return canonical_package_name(name or full_name.rsplit("/", 1)[-1])
@@ -1,24 +1,72 @@
 """Pinecone client for vector search operations."""
 
-from typing import List, Dict, Any, Optional
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from pinecone import Pinecone, ServerlessSpec
 import google.generativeai as genai
+from tenacity import retry, stop_after_attempt, wait_exponential
 
 from config import settings
 from db.schemas import RepoResult
+from db.embedding_cache import EmbeddingCache, embedding_key
+from db.vector_store import LocalVectorStore, VectorStore
+
+
+def _pack(items: List[Any], max_items: int, max_bytes: int, size_of: Callable[[Any], int]) -> Iterator[List[Any]]:
+    """Split ``items`` into consecutive chunks that respect both count and payload limits."""
+    chunk, chunk_bytes = [], 0
+    for item in items:
+        size = size_of(item)
+        if chunk and (len(chunk) >= max_items or chunk_bytes + size > max_bytes):
+            yield chunk
+            chunk, chunk_bytes = [], 0
+        chunk.append(item)
+        chunk_bytes += size
+    if chunk:
+        yield chunk
+
+
+def _vector_size(vector: Tuple[str, List[float], Dict[str, Any]]) -> int:
+    """Rough request payload size of one upserted vector."""
+    repo_id, values, metadata = vector
+    return len(repo_id) + len(values) * 12 + len(json.dumps(metadata))
 
 
 class PineconeClient:
     """Wrapper for Pinecone vector database."""
     
     def __init__(self):
-        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY)
+        self.backend = settings.VECTOR_BACKEND
+        # The local backend runs fully offline, so no Pinecone credentials are needed
+        self.pc = Pinecone(api_key=settings.PINECONE_API_KEY) if self.backend == "pinecone" else None
         self.index_name = settings.PINECONE_INDEX_NAME
-        self.index = None
+        self.index: Optional[VectorStore] = None
         genai.configure(api_key=settings.GOOGLE_API_KEY)
+        self.embedding_cache = EmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            dimension=settings.PINECONE_DIMENSION,
+            max_memory_items=settings.EMBEDDING_CACHE_MEMORY_ITEMS,
+        )
+        # Hot query embeddings keyed by normalized query text
+        self._query_vectors: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        self.query_hits = 0
+        self.query_misses = 0
         
     def create_index(self):
         """Create Pinecone index if it doesn't exist."""
+        if self.backend == "local":
+            self.index = LocalVectorStore.load(
+                settings.LOCAL_VECTOR_PATH,
+                dimension=settings.PINECONE_DIMENSION,
+                approximate=settings.LOCAL_VECTOR_APPROXIMATE,
+                nprobe=settings.LOCAL_VECTOR_NPROBE,
+            )
+            print(f"Local vector index loaded: {settings.LOCAL_VECTOR_PATH}")
+            return
+        
         if self.index_name not in self.pc.list_indexes().names():
             print(f"Creating index: {self.index_name}")
             self.pc.create_index(
@@ -35,11 +83,17 @@ class PineconeClient:
         
     def embed_text(self, text: str) -> List[float]:
         """Convert text to vector embedding."""
+        key = embedding_key(settings.EMBEDDING_MODEL, "retrieval_document", text)
+        cached = self.embedding_cache.get(key)
+        if cached is not None:
+            return cached
+        
         result = genai.embed_content(
             model=settings.EMBEDDING_MODEL,
             content=text,
             task_type="retrieval_document"
         )
+        self.embedding_cache.put(key, result['embedding'])
         return result['embedding']
     
     def upsert_repo(self, repo_id: str, readme_text: str, metadata: Dict[str, Any]) -> None:
@@ -48,14 +102,205 @@ class PineconeClient:
             self.create_index()
         
         vector = self.embed_text(readme_text)
+        self.upsert_vector(repo_id, vector, metadata)
+    
+    def upsert_vector(self, repo_id: str, vector: List[float], metadata: Dict[str, Any]) -> None:
+        """Add or update a repository from a precomputed embedding."""
+        if not self.index:
+            self.create_index()
+        
         self.index.upsert(vectors=[(repo_id, vector, metadata)])
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10), reraise=True)
+    def _embed_request(self, texts: List[str], task_type: str = "retrieval_document") -> List[List[float]]:
+        """One batched embedding call."""
+        result = genai.embed_content(
+            model=settings.EMBEDDING_MODEL,
+            content=texts,
+            task_type=task_type
+        )
+        return result['embedding']
+    
+    def _embed_chunk(self, texts: List[str], task_type: str = "retrieval_document") -> List[Optional[List[float]]]:
+        """Embed a chunk, bisecting on failure; texts that fail on their own get None."""
+        try:
+            return self._embed_request(texts, task_type)
+        except Exception as e:
+            if len(texts) == 1:
+                print(f"Embedding failed for a text of {len(texts[0])} chars: {e}")
+                return [None]
+            print(f"Embedding batch of {len(texts)} failed ({e}), splitting")
+            mid = len(texts) // 2
+            return self._embed_chunk(texts[:mid], task_type) + self._embed_chunk(texts[mid:], task_type)
+    
+    def _embed_uncached(self, texts: List[str], task_type: str) -> List[Optional[List[float]]]:
+        """Embed texts in as few requests as allowed, bypassing the embedding cache; None where one failed."""
+        embedded = []
+        for chunk in _pack(texts, settings.EMBED_BATCH_SIZE, settings.EMBED_BATCH_MAX_CHARS, len):
+            embedded.extend(self._embed_chunk(chunk, task_type))
+        return embedded
+    
+    def embed_batch(self, texts: List[str], task_type: str = "retrieval_document") -> List[Optional[List[float]]]:
+        """Convert many texts to embeddings, packing them into as few requests as allowed.
+        
+        Cached texts are served from the embedding cache; only distinct misses are sent.
+        A text the provider rejects even on its own gets None instead of failing the batch.
+        """
+        keys = [embedding_key(settings.EMBEDDING_MODEL, task_type, text) for text in texts]
+        vectors: Dict[bytes, Optional[List[float]]] = {}
+        missing: Dict[bytes, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            cached = self.embedding_cache.get(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = text
+        
+        missing_keys = list(missing)
+        embedded = self._embed_uncached(list(missing.values()), task_type)
+        for key, vector in zip(missing_keys, embedded):
+            if vector is not None:
+                self.embedding_cache.put(key, vector)
+            vectors[key] = vector
+        
+        return [vectors[key] for key in keys]
+    
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+    
+    def _remember_query(self, text: str, vector: List[float]) -> None:
+        with self._query_lock:
+            self._query_vectors[text] = vector
+            self._query_vectors.move_to_end(text)
+            while len(self._query_vectors) > settings.QUERY_EMBEDDING_CACHE_ITEMS:
+                self._query_vectors.popitem(last=False)
+    
+    def embed_query(self, query: str) -> List[float]:
+        """Embed a search query with the retrieval_query task type, via a hot LRU of recent queries.
+        
+        Query vectors live only in that bounded LRU, never in the persistent document
+        cache. The normalized text is the cache key; the query itself is what gets embedded.
+        """
+        key = self._normalize_query(query)
+        with self._query_lock:
+            vector = self._query_vectors.get(key)
+            if vector is not None:
+                self._query_vectors.move_to_end(key)
+                self.query_hits += 1
+                return vector
+            self.query_misses += 1
+        
+        vector = self._embed_request([query.strip()], "retrieval_query")[0]
+        self._remember_query(key, vector)
+        return vector
+    
+    def warm_query_embeddings(self, queries: List[str]) -> int:
+        """Precompute embeddings for frequent queries in batched calls; returns how many were added."""
+        pending: Dict[str, str] = {}
+        with self._query_lock:
+            for query in queries:
+                key = self._normalize_query(query)
+                if key and key not in self._query_vectors:
+                    pending.setdefault(key, query.strip())
+        if not pending:
+            return 0
+        
+        added = 0
+        for key, vector in zip(pending, self._embed_uncached(list(pending.values()), "retrieval_query")):
+            if vector is not None:
+                self._remember_query(key, vector)
+                added += 1
+        return added
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10), reraise=True)
+    def _upsert_request(self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        """One batched upsert call."""
+        self.index.upsert(vectors=vectors)
+    
+    def _upsert_chunk(self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]) -> List[str]:
+        """Upsert a chunk, bisecting on failure; returns the ids that could not be written."""
+        try:
+            self._upsert_request(vectors)
+            return []
+        except Exception as e:
+            if len(vectors) == 1:
+                print(f"Upsert failed for {vectors[0][0]}: {e}")
+                return [vectors[0][0]]
+            print(f"Upsert batch of {len(vectors)} failed ({e}), splitting")
+            mid = len(vectors) // 2
+            return self._upsert_chunk(vectors[:mid]) + self._upsert_chunk(vectors[mid:])
+    
+    def upsert_vectors(self, vectors: List[Tuple[str, List[float], Dict[str, Any]]]) -> List[str]:
+        """Add or update many precomputed ``(id, vector, metadata)`` tuples.
+        
+        Returns the ids that failed even after splitting and retrying.
+        """
+        if not self.index:
+            self.create_index()
+        
+        failed = []
+        for chunk in _pack(vectors, settings.PINECONE_UPSERT_BATCH_SIZE, settings.PINECONE_UPSERT_MAX_BYTES, _vector_size):
+            failed.extend(self._upsert_chunk(chunk))
+        return failed
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10), reraise=True)
+    def _update_request(self, repo_id: str, metadata: Dict[str, Any]) -> None:
+        """One metadata update call."""
+        self.index.update(id=repo_id, set_metadata=metadata)
+    
+    def update_metadata(self, items: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Replace the metadata of existing vectors without re-embedding them.
+        
+        Returns the ids that could not be updated.
+        """
+        if not self.index:
+            self.create_index()
+        
+        failed = []
+        for repo_id, metadata in items:
+            try:
+                self._update_request(repo_id, metadata)
+            except Exception as e:
+                print(f"Metadata update failed for {repo_id}: {e}")
+                failed.append(repo_id)
+        return failed
+    
+    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, max=10), reraise=True)
+    def _fetch_request(self, ids: List[str]) -> List[str]:
+        """One fetch call; returns which of ``ids`` are stored."""
+        return list(self.index.fetch(ids=ids).vectors)
+    
+    def missing_ids(self, ids: List[str]) -> List[str]:
+        """The ids among ``ids`` that have no vector in the index, e.g. after it was recreated."""
+        if not self.index:
+            self.create_index()
+        
+        stored = set()
+        for start in range(0, len(ids), settings.PINECONE_UPSERT_BATCH_SIZE):
+            stored.update(self._fetch_request(ids[start:start + settings.PINECONE_UPSERT_BATCH_SIZE]))
+        return [repo_id for repo_id in ids if repo_id not in stored]
+    
+    def upsert_repos(self, repos: List[Dict[str, Any]]) -> List[str]:
+        """Embed and upsert many repos given as ``{"repo_id", "readme_text", "metadata"}`` dicts.
+        
+        Returns the ids that could not be written.
+        """
+        vectors = self.embed_batch([repo["readme_text"] for repo in repos])
+        unembedded = [repo["repo_id"] for repo, vector in zip(repos, vectors) if vector is None]
+        return unembedded + self.upsert_vectors([
+            (repo["repo_id"], vector, repo["metadata"])
+            for repo, vector in zip(repos, vectors) if vector is not None
+        ])
         
     def search(self, query: str, top_k: int = 10, filter_dict: Optional[Dict] = None) -> List[RepoResult]:
         """Semantic search for repositories."""
         if not self.index:
             self.create_index()
         
-        query_vector = self.embed_text(query)
+        query_vector = self.embed_query(query)
         
         results = self.index.query(
             vector=query_vector,
@@ -78,6 +323,11 @@ class PineconeClient:
         
         return repo_results
     
+    def persist(self) -> None:
+        """Save the local index to disk; Pinecone persists on its own."""
+        if isinstance(self.index, LocalVectorStore):
+            self.index.save()
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get index statistics."""
         if not self.index:
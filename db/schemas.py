@@ -27,6 +27,19 @@ class RepoResult(BaseModel):
     score: float = 0.0
     reason: Optional[str] = None
     url: str = ""
+    # Number of queried packages this repo depends on (graph results only)
+    match_count: int = 0
+
+
+class SearchFilters(BaseModel):
+    """Structured constraints applied inside both the vector and graph queries."""
+    language: Optional[str] = None
+    min_stars: Optional[int] = None
+    topics: List[str] = Field(default_factory=list)
+    depends_on: List[str] = Field(default_factory=list)
+    
+    def is_empty(self) -> bool:
+        return not (self.language or self.min_stars or self.topics or self.depends_on)
 
 
 class GitGraphState(BaseModel):
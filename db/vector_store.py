@@ -0,0 +1,294 @@
+"""Pluggable vector-store interface and an in-process NumPy backend."""
+
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+
+class Match(NamedTuple):
+    """One query hit, shaped like a Pinecone match."""
+    id: str
+    score: float
+    metadata: Dict[str, Any]
+
+
+class QueryResponse(NamedTuple):
+    """Query result, shaped like a Pinecone query response."""
+    matches: List[Match]
+
+
+class FetchResponse(NamedTuple):
+    """Fetch result, shaped like a Pinecone fetch response: stored ids mapped to their metadata."""
+    vectors: Dict[str, Dict[str, Any]]
+
+
+class VectorStore(Protocol):
+    """What PineconeClient needs from an index; a Pinecone ``Index`` satisfies it as-is."""
+    
+    def upsert(self, vectors: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> Any:
+        ...
+    
+    def update(self, id: str, set_metadata: Optional[Dict[str, Any]] = None) -> Any:
+        ...
+    
+    def fetch(self, ids: List[str]) -> Any:
+        ...
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        include_metadata: bool = True,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        ...
+    
+    def describe_index_stats(self) -> Dict[str, Any]:
+        ...
+
+
+_COMPARATORS = {
+    "$eq": lambda value, operand: value == operand,
+    "$ne": lambda value, operand: value != operand,
+    "$gt": lambda value, operand: value is not None and value > operand,
+    "$gte": lambda value, operand: value is not None and value >= operand,
+    "$lt": lambda value, operand: value is not None and value < operand,
+    "$lte": lambda value, operand: value is not None and value <= operand,
+    "$in": lambda value, operand: (bool(set(value) & set(operand)) if isinstance(value, list) else value in operand),
+    "$nin": lambda value, operand: (not set(value) & set(operand) if isinstance(value, list) else value not in operand),
+}
+
+
+def matches_filter(metadata: Dict[str, Any], filter_dict: Optional[Dict[str, Any]]) -> bool:
+    """Evaluate a Pinecone-style metadata filter against one metadata dict."""
+    if not filter_dict:
+        return True
+    
+    for field, condition in filter_dict.items():
+        if field == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif field == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(field)
+            if not all(_COMPARATORS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif isinstance(metadata.get(field), list):
+            # Pinecone treats equality against a list field as membership
+            if condition not in metadata[field]:
+                return False
+        elif metadata.get(field) != condition:
+            return False
+    
+    return True
+
+
+def _replace_file(target: Path, write: Callable[[Any], Any]) -> None:
+    """Write a sibling temp file with ``write`` and atomically rename it over ``target``."""
+    fd, temp = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        os.replace(temp, target)
+    except BaseException:
+        os.unlink(temp)
+        raise
+
+
+class LocalVectorStore:
+    """In-process cosine index over a float32 matrix with parallel id/metadata arrays.
+    
+    Exact search is a brute-force matrix-vector product. With ``approximate=True``
+    and enough vectors, an IVF index (spherical k-means centroids with inverted
+    lists) restricts scoring to the ``nprobe`` closest clusters.
+    """
+    
+    def __init__(
+        self,
+        dimension: int,
+        path: Optional[str] = None,
+        approximate: bool = False,
+        nprobe: int = 8,
+        ivf_min_vectors: int = 10000,
+    ):
+        self.dimension = dimension
+        self.path = Path(path) if path else None
+        self.approximate = approximate
+        self.nprobe = nprobe
+        self.ivf_min_vectors = ivf_min_vectors
+        
+        self._vectors = np.zeros((0, dimension), dtype=np.float32)
+        self._count = 0
+        self.ids: List[str] = []
+        self.metadata: List[Dict[str, Any]] = []
+        self._rows: Dict[str, int] = {}
+        
+        self._centroids: Optional[np.ndarray] = None
+        self._lists: List[List[int]] = []
+        self._trained_at = 0
+        # Ingestion upserts from worker threads while searches read
+        self._lock = threading.RLock()
+    
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+    
+    def _ensure_capacity(self, needed: int) -> None:
+        """Grow the matrix geometrically; also turns a read-only memory map into an array."""
+        capacity = len(self._vectors)
+        if needed <= capacity and self._vectors.flags.writeable:
+            return
+        grown = np.zeros((max(needed, capacity * 2, 64), self.dimension), dtype=np.float32)
+        grown[:self._count] = self._vectors[:self._count]
+        self._vectors = grown
+    
+    def upsert(self, vectors: Sequence[Tuple[str, List[float], Dict[str, Any]]]) -> None:
+        """Insert or overwrite ``(id, values, metadata)`` tuples."""
+        if not vectors:
+            return
+        
+        values = self._normalize(np.asarray([v[1] for v in vectors], dtype=np.float32))
+        with self._lock:
+            self._upsert_rows(vectors, values)
+    
+    def _upsert_rows(self, vectors: Sequence[Tuple[str, List[float], Dict[str, Any]]], values: np.ndarray) -> None:
+        self._ensure_capacity(self._count + len(vectors))
+        
+        for (repo_id, _, metadata), value in zip(vectors, values):
+            row = self._rows.get(repo_id)
+            if row is None:
+                row = self._count
+                self._count += 1
+                self._rows[repo_id] = row
+                self.ids.append(repo_id)
+                self.metadata.append(dict(metadata))
+                if self._centroids is not None:
+                    self._lists[int(np.argmax(self._centroids @ value))].append(row)
+            else:
+                self.metadata[row] = dict(metadata)
+            self._vectors[row] = value
+    
+    def update(self, id: str, set_metadata: Optional[Dict[str, Any]] = None) -> None:
+        """Merge ``set_metadata`` into an existing vector's metadata; unknown ids are ignored."""
+        with self._lock:
+            row = self._rows.get(id)
+            if row is not None and set_metadata:
+                self.metadata[row] = {**self.metadata[row], **set_metadata}
+    
+    def fetch(self, ids: List[str]) -> FetchResponse:
+        """The stored vectors among ``ids``; unknown ids are left out."""
+        with self._lock:
+            return FetchResponse({id: dict(self.metadata[self._rows[id]]) for id in ids if id in self._rows})
+    
+    def _train(self, iterations: int = 10, sample_size: int = 50000) -> None:
+        """Cluster the vectors with spherical k-means and build the inverted lists."""
+        vectors = self._vectors[:self._count]
+        nlist = max(int(np.sqrt(self._count)), 1)
+        rng = np.random.default_rng(0)
+        
+        sample = vectors[rng.choice(self._count, min(sample_size, self._count), replace=False)]
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            for c in range(nlist):
+                members = sample[assignment == c]
+                if len(members):
+                    centroids[c] = members.sum(axis=0)
+            centroids = self._normalize(centroids)
+        
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        self._lists = [np.flatnonzero(assignment == c).tolist() for c in range(nlist)]
+        self._centroids = centroids
+        self._trained_at = self._count
+    
+    def _candidate_rows(self, query: np.ndarray) -> Optional[np.ndarray]:
+        """Rows to score for an approximate query, or None for a full scan."""
+        if not self.approximate or self._count < self.ivf_min_vectors:
+            return None
+        # Retrain once the corpus has doubled since the last clustering
+        if self._centroids is None or self._count >= 2 * self._trained_at:
+            self._train()
+        
+        probes = np.argsort(-(self._centroids @ query))[:self.nprobe]
+        return np.fromiter((row for c in probes for row in self._lists[c]), dtype=np.int64)
+    
+    def query(
+        self,
+        vector: List[float],
+        top_k: int,
+        include_metadata: bool = True,
+        filter: Optional[Dict[str, Any]] = None,
+    ) -> QueryResponse:
+        """Return the ``top_k`` most cosine-similar vectors that pass ``filter``."""
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        with self._lock:
+            return self._query(query, top_k, include_metadata, filter)
+    
+    def _query(
+        self,
+        query: np.ndarray,
+        top_k: int,
+        include_metadata: bool,
+        filter: Optional[Dict[str, Any]],
+    ) -> QueryResponse:
+        if self._count == 0:
+            return QueryResponse([])
+        
+        rows = self._candidate_rows(query)
+        if rows is None:
+            rows = np.arange(self._count)
+        if filter:
+            rows = rows[[matches_filter(self.metadata[row], filter) for row in rows]]
+        if len(rows) == 0:
+            return QueryResponse([])
+        
+        scores = self._vectors[rows] @ query
+        k = min(top_k, len(rows))
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        
+        return QueryResponse([
+            Match(self.ids[rows[i]], float(scores[i]), self.metadata[rows[i]] if include_metadata else {})
+            for i in best
+        ])
+    
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Index statistics in the same shape as Pinecone's."""
+        return {"dimension": self.dimension, "total_vector_count": self._count}
+    
+    def save(self, path: Optional[str] = None) -> None:
+        """Write the matrix as ``vectors.npy`` and ids/metadata as ``metadata.json``.
+        
+        Both are written to temp files and renamed into place: ``vectors.npy`` may be
+        memory-mapped by this store or another process, so it must never be truncated.
+        """
+        directory = Path(path) if path else self.path
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            _replace_file(directory / "vectors.npy", lambda f: np.save(f, np.ascontiguousarray(self._vectors[:self._count])))
+            _replace_file(directory / "metadata.json", lambda f: f.write(json.dumps({"ids": self.ids, "metadata": self.metadata}).encode("utf-8")))
+    
+    @classmethod
+    def load(cls, path: str, **kwargs) -> "LocalVectorStore":
+        """Open a saved store; vectors stay memory-mapped until the first write."""
+        directory = Path(path)
+        store = cls(path=path, **kwargs)
+        if not (directory / "vectors.npy").exists():
+            return store
+        
+        store._vectors = np.load(directory / "vectors.npy", mmap_mode="r")
+        store._count = len(store._vectors)
+        with open(directory / "metadata.json") as f:
+            saved = json.load(f)
+        store.ids = saved["ids"]
+        store.metadata = saved["metadata"]
+        store._rows = {repo_id: row for row, repo_id in enumerate(store.ids)}
+        return store
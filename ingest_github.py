@@ -1,15 +1,33 @@
 """Ingest repos from GitHub into Pinecone and Neo4j."""
 
+import argparse
+import asyncio
 import sys
 from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Optional
 sys.path.insert(0, str(Path(__file__).parent))
 
+from config import settings
 from ingestion import github_fetcher
+from ingestion.job_queue import WRITTEN, JobQueue, worker_id
+from ingestion.manifest import IngestManifest
+from ingestion.pipeline import IngestionPipeline, repo_vector_metadata
+from ingestion.seen_set import SeenSet
+from ingestion.workers import drain_parallel, ingest_parallel, parallel_supported
 from db import pinecone_client, neo4j_client
 
 
-def ingest_repo(full_name: str) -> bool:
-    """Ingest a single repo into both databases."""
+def ingest_repo(
+    full_name: str,
+    fetched: Optional[Dict[str, Any]] = None,
+    manifest: Optional[IngestManifest] = None,
+) -> bool:
+    """Ingest a single repo into both databases.
+    
+    ``fetched`` is an entry from ``github_fetcher.fetch_repos_batch``; when given,
+    the per-repo REST calls are skipped. With a ``manifest`` only the parts that
+    changed since the last ingestion are written.
+    """
     parts = full_name.split("/")
     if len(parts) != 2:
         print(f"Invalid repo name: {full_name}")
@@ -18,69 +36,186 @@ def ingest_repo(full_name: str) -> bool:
     owner, repo = parts
     print(f"\nIngesting: {full_name}")
     
-    # Fetch repo data
-    print("  Fetching metadata...")
-    repo_data = github_fetcher.fetch_repo(owner, repo)
-    if not repo_data:
-        return False
+    if fetched:
+        repo_data = fetched["repo"]
+        readme = fetched["readme"]
+        deps = fetched["dependencies"]
+    else:
+        # Fetch repo data
+        print("  Fetching metadata...")
+        repo_data = github_fetcher.fetch_repo(owner, repo)
+        if not repo_data:
+            return False
+        
+        # Fetch README
+        print("  Fetching README...")
+        readme = github_fetcher.fetch_readme(owner, repo)
+        
+        # Fetch dependencies
+        print("  Fetching dependencies...")
+        deps = github_fetcher.fetch_dependencies(owner, repo)
     
-    # Fetch README
-    print("  Fetching README...")
-    readme = github_fetcher.fetch_readme(owner, repo)
     if not readme:
         readme = repo_data.get("description", "")
     
-    # Fetch dependencies
-    print("  Fetching dependencies...")
-    deps = github_fetcher.fetch_dependencies(owner, repo)
-    
-    # Add to Pinecone
-    print("  Adding to Pinecone...")
-    pinecone_client.upsert_repo(
-        repo_id=full_name,
-        readme_text=readme,
-        metadata={
-            "name": repo_data["name"],
-            "description": repo_data["description"],
-            "stars": repo_data["stars"],
-            "language": repo_data["language"],
-            "url": repo_data["url"]
-        }
-    )
+    changes = manifest.diff(full_name, repo_data, readme, deps) if manifest else None
+    if changes and changes.unchanged:
+        print("  Unchanged, skipping")
+        return True
+    
+    # Add to Pinecone; an unchanged README is re-embedded if its vector has gone missing
+    if changes is None or changes.readme or pinecone_client.missing_ids([full_name]):
+        print("  Adding to Pinecone...")
+        pinecone_client.upsert_repo(
+            repo_id=full_name,
+            readme_text=readme,
+            metadata=repo_vector_metadata(repo_data, deps)
+        )
+    else:
+        print("  Updating Pinecone metadata...")
+        if pinecone_client.update_metadata([(full_name, repo_vector_metadata(repo_data, deps))]):
+            return False
     
     # Add to Neo4j
-    print("  Adding to Neo4j...")
-    neo4j_client.create_repo_node(
-        full_name=full_name,
-        metadata=repo_data
-    )
-    
-    # Add dependencies
-    if deps:
-        print(f"  Adding {len(deps)} dependencies...")
-        for dep in deps:
-            neo4j_client.create_dependency(full_name, dep)
+    if changes is None or changes.metadata:
+        print("  Adding to Neo4j...")
+        neo4j_client.create_repo_node(
+            full_name=full_name,
+            metadata=repo_data
+        )
+    
+    # Replace dependencies
+    if changes is None or changes.deps:
+        print(f"  Setting {len(deps)} dependencies...")
+        neo4j_client.prune_dependencies([(full_name, deps)])
+        neo4j_client.create_dependencies([(full_name, dep) for dep in deps])
+    
+    if manifest:
+        manifest.record({full_name: changes.fingerprint})
     
     print(f"  Done!")
     return True
 
 
-def ingest_from_search(query: str, limit: int = 20):
-    """Ingest repos from a GitHub search."""
+def ingest_repos(
+    repos: Iterable[str],
+    serial: bool = False,
+    graphql: bool = False,
+    manifest: Optional[IngestManifest] = None,
+    workers: int = 1,
+) -> int:
+    """Ingest repos, returning how many succeeded or were already up to date.
+    
+    ``repos`` can be a crawler generator; the pipeline and worker pool consume it as it streams.
+    """
+    if workers > 1 and not serial:
+        return ingest_parallel(repos, workers, graphql=graphql, incremental=manifest is not None)
+    
+    if serial:
+        if graphql:
+            repos = list(repos)
+        batch = github_fetcher.fetch_repos_batch(repos) if graphql else {}
+        success = 0
+        for repo in repos:
+            if graphql and repo not in batch:
+                continue
+            if ingest_repo(repo, batch.get(repo), manifest):
+                success += 1
+        return success
+    
+    pipeline = IngestionPipeline(graphql=graphql, manifest=manifest)
+    success = asyncio.run(pipeline.run(repos))
+    pipeline.print_stats()
+    return success + pipeline.skipped
+
+
+def ingest_from_search(
+    query: str,
+    limit: int = 20,
+    serial: bool = False,
+    graphql: bool = False,
+    manifest: Optional[IngestManifest] = None,
+):
+    """Ingest repos from a GitHub search, starting on each result page as it arrives."""
     print(f"\nSearching GitHub for: {query}")
-    repos = github_fetcher.search_repos(query, limit=limit)
+    found = 0
+    
+    def stream() -> Iterator[str]:
+        nonlocal found
+        for repo in github_fetcher.iter_search_repos(query, limit=limit, per_page=limit):
+            found += 1
+            yield repo
+    
+    success = ingest_repos(stream(), serial=serial, graphql=graphql, manifest=manifest)
     
-    print(f"Found {len(repos)} repos")
+    print(f"\nIngested {success}/{found} repos")
+
+
+def drain_job(
+    queue: JobQueue,
+    serial: bool = False,
+    graphql: bool = False,
+    manifest: Optional[IngestManifest] = None,
+    workers: int = 1,
+) -> int:
+    """Work through a job queue, alongside any other worker processes, until nothing is left to retry.
     
+    Repos this worker claimed but did not write are scheduled for a retry with backoff.
+    """
+    if workers > 1 and not serial:
+        success = drain_parallel(queue, workers, graphql=graphql, incremental=manifest is not None)
+        counts = queue.counts()
+        print("Job queue: " + ", ".join(f"{count} {state}" for state, count in sorted(counts.items())))
+        return success
+    
+    worker = worker_id()
     success = 0
-    for repo in repos:
-        if ingest_repo(repo):
-            success += 1
     
-    print(f"\nIngested {success}/{len(repos)} repos")
+    while True:
+        if serial:
+            while True:
+                names = queue.claim(worker)
+                if not names:
+                    break
+                batch = github_fetcher.fetch_repos_batch(names) if graphql else {}
+                for name in names:
+                    if graphql and name not in batch:
+                        continue
+                    if ingest_repo(name, batch.get(name), manifest):
+                        queue.advance([name], WRITTEN)
+                        success += 1
+        else:
+            pipeline = IngestionPipeline(graphql=graphql, manifest=manifest, queue=queue)
+            success += asyncio.run(pipeline.run(queue.drain(worker))) + pipeline.skipped
+            pipeline.print_stats()
+        
+        retried = queue.fail_unfinished(worker, "not written")
+        if retried:
+            print(f"{retried} repos failed and will be retried")
+        
+        if not queue.wait_for_retry():
+            break
+    
+    counts = queue.counts()
+    print("Job queue: " + ", ".join(f"{count} {state}" for state, count in sorted(counts.items())))
+    return success
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Ingest GitHub repos into Pinecone and Neo4j")
+    parser.add_argument("--serial", action="store_true", help="ingest one repo at a time instead of the async pipeline")
+    parser.add_argument("--graphql", action="store_true", help="fetch metadata, README and requirements in batched GraphQL queries")
+    parser.add_argument("--incremental", action="store_true", help="skip repos unchanged since the last run and only rewrite what changed")
+    parser.add_argument("--job", action="store_true", help="queue the search results in a resumable job (INGEST_JOB_PATH) and drain it")
+    parser.add_argument("--drain", action="store_true", help="only drain an existing job queue, e.g. as an extra worker process")
+    parser.add_argument("--workers", type=int, default=settings.INGEST_WORKERS, help="ingest with N worker processes")
+    args = parser.parse_args()
+    if args.workers > 1 and not parallel_supported():
+        print("--workers needs the Pinecone and Neo4j backends; local stores live in one process. Using 1 worker.")
+        args.workers = 1
+    manifest = IngestManifest(settings.INGEST_MANIFEST_PATH) if args.incremental else None
+    queue = JobQueue(settings.INGEST_JOB_PATH) if args.job or args.drain else None
+    
     print("=" * 60)
     print("GitGraph RAG - GitHub Ingestion")
     print("=" * 60)
@@ -89,6 +224,9 @@ def main():
     print("\nInitializing databases...")
     pinecone_client.create_index()
     neo4j_client.create_constraints()
+    backfilled = neo4j_client.backfill_package_names()
+    if backfilled:
+        print(f"Backfilled package names on {backfilled} existing nodes")
     
     # Ingest popular AI/ML repos
     queries = [
@@ -98,8 +236,26 @@ def main():
         "rag retrieval"
     ]
     
-    for query in queries:
-        ingest_from_search(query, limit=10)
+    if queue is None and args.workers > 1:
+        # Shard every query's results over one pool instead of starting a pool per query
+        seen = SeenSet()
+        repos = (
+            repo for query in queries for repo in github_fetcher.iter_search_repos(query, limit=10, per_page=10)
+            if seen.add(repo)
+        )
+        success = ingest_repos(repos, graphql=args.graphql, manifest=manifest, workers=args.workers)
+        print(f"\nIngested {success}/{len(seen)} repos")
+    elif queue is None:
+        for query in queries:
+            ingest_from_search(query, limit=10, serial=args.serial, graphql=args.graphql, manifest=manifest)
+    else:
+        if not args.drain:
+            for query in queries:
+                print(f"\nSearching GitHub for: {query}")
+                added = queue.enqueue(github_fetcher.iter_search_repos(query, limit=10, per_page=10))
+                print(f"Queued {added} new repos")
+        success = drain_job(queue, serial=args.serial, graphql=args.graphql, manifest=manifest, workers=args.workers)
+        print(f"\nIngested {success} repos")
     
     # Show stats
     print("\n" + "=" * 60)
@@ -110,7 +266,17 @@ def main():
     pinecone_stats = pinecone_client.get_stats()
     print(f"  Pinecone: {pinecone_stats.get('total_vector_count', 0)} vectors")
     
+    cache_stats = pinecone_client.embedding_cache.stats()
+    print(f"  Embedding cache: {cache_stats['hit_rate']:.0%} hit rate "
+          f"({cache_stats['memory_hits']} memory, {cache_stats['disk_hits']} disk, {cache_stats['misses']} misses)")
+    
+    pinecone_client.persist()
+    if manifest:
+        manifest.close()
+    if queue:
+        queue.close()
     neo4j_client.close()
+    github_fetcher.close()
     print("\nDone!")
 
 
@@ -1,8 +1,30 @@
 """GitHub fetcher to dynamically ingest repos from GitHub API."""
 
+import re
+from itertools import islice
+
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from tenacity import AsyncRetrying, Retrying, retry_if_exception_type, stop_after_attempt
 from config import settings
+from .rate_limiter import RateLimitExceeded, RateLimitScheduler, github_rate_limiter, wait_for_rate_limit
+from .response_cache import CachedResponse, ResponseCache
+from .seen_set import SeenSet
+
+
+_REPO_LINK = re.compile(r"github\.com/([A-Za-z0-9_-]+)/([A-Za-z0-9_.-]+)")
+
+# github.com paths that look like owner/repo but are not repositories
+_NON_REPO_OWNERS = {"about", "apps", "collections", "features", "marketplace", "orgs", "settings", "sponsors", "topics"}
+
+
+def _give_up(retry_state) -> httpx.Response:
+    """After the last retry, hand back the rate-limited response instead of raising."""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimitExceeded):
+        print(f"Giving up after {retry_state.attempt_number} attempts: {exc}")
+        return exc.response
+    raise exc
 
 
 class GitHubFetcher:
@@ -10,110 +32,476 @@ class GitHubFetcher:
     
     BASE_URL = "https://api.github.com"
     
-    def __init__(self):
+    # GraphQL needs exact blob paths; tried in order, like the REST /readme lookup
+    README_PATHS = ["README.md", "readme.md", "README.rst", "README.txt", "README"]
+    
+    # Results GitHub serves for any one search query, however many pages are requested
+    SEARCH_RESULT_CAP = 1000
+    
+    def __init__(
+        self,
+        base_url: Optional[str] = None,
+        http2: Optional[bool] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        timeout: Optional[float] = None,
+        transport: Optional[httpx.BaseTransport] = None,
+        async_transport: Optional[httpx.AsyncBaseTransport] = None,
+        scheduler: Optional[RateLimitScheduler] = None,
+        cache: Optional[ResponseCache] = None,
+    ):
+        self.BASE_URL = base_url or self.BASE_URL
+        self.GRAPHQL_URL = f"{self.BASE_URL}/graphql"
         self.headers = {
             "Accept": "application/vnd.github+json",
-            "Authorization": f"Bearer {settings.GITHUB_TOKEN}",
             "X-GitHub-Api-Version": "2022-11-28"
         }
+        if settings.GITHUB_TOKEN:
+            self.headers["Authorization"] = f"Bearer {settings.GITHUB_TOKEN}"
+        self.raw_headers = {**self.headers, "Accept": "application/vnd.github.raw"}
+        
+        # One long-lived pool per fetcher so requests reuse TCP/TLS connections
+        self.http2 = settings.GITHUB_HTTP2 if http2 is None else http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections or settings.GITHUB_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.GITHUB_MAX_KEEPALIVE_CONNECTIONS,
+        )
+        self.timeout = httpx.Timeout(timeout or settings.GITHUB_TIMEOUT)
+        self.client = httpx.Client(
+            headers=self.headers,
+            http2=self.http2,
+            limits=self.limits,
+            timeout=self.timeout,
+            transport=transport,
+        )
+        self._async_transport = async_transport
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self.scheduler = scheduler or github_rate_limiter
+        
+        if cache is None and settings.GITHUB_CACHE_PATH:
+            cache = ResponseCache(
+                settings.GITHUB_CACHE_PATH,
+                max_bytes=settings.GITHUB_CACHE_MAX_BYTES,
+                max_age=settings.GITHUB_CACHE_MAX_AGE,
+            )
+        self.cache = cache
+    
+    def __enter__(self) -> "GitHubFetcher":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    async def __aenter__(self) -> "GitHubFetcher":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+        self.close()
+    
+    def close(self) -> None:
+        """Close the pooled sync client and the response cache."""
+        self.client.close()
+        if self.cache is not None:
+            self.cache.close()
+    
+    def _resource_for(self, url: str) -> str:
+        """Name of the GitHub quota a request to ``url`` counts against."""
+        if url.endswith("/graphql"):
+            return "graphql"
+        return "search" if "/search/" in url else "core"
+    
+    def _retry_policy(self) -> Dict[str, Any]:
+        return {
+            "retry": retry_if_exception_type((RateLimitExceeded, httpx.TransportError)),
+            "wait": wait_for_rate_limit,
+            "stop": stop_after_attempt(settings.GITHUB_MAX_RETRIES),
+            "retry_error_callback": _give_up,
+        }
+    
+    def _check_cache(self, url: str, kwargs: Dict[str, Any]) -> tuple:
+        """Look up ``url`` in the response cache and add conditional headers to ``kwargs``.
+        
+        Returns ``(key, entry, fresh_response)``; ``fresh_response`` is set when the
+        cached body can be served without touching the network.
+        """
+        if self.cache is None:
+            return None, None, None
+        
+        key = self.cache.key_for(url, kwargs.get("headers", self.headers), kwargs.get("params"))
+        entry = self.cache.get(key)
+        if entry is None:
+            self.cache.misses += 1
+            return key, None, None
+        
+        if entry.is_fresh(self.cache.max_age):
+            self.cache.hits += 1
+            return key, entry, entry.to_response()
+        
+        kwargs["headers"] = {**kwargs.get("headers", {}), **entry.conditional_headers()}
+        return key, entry, None
+    
+    def _update_cache(self, key: Optional[str], entry: Optional[CachedResponse], response: httpx.Response) -> httpx.Response:
+        """Store new bodies and swap 304s for the cached body."""
+        if self.cache is None:
+            return response
+        
+        if response.status_code == 304 and entry is not None:
+            self.cache.revalidated += 1
+            self.cache.touch(key)
+            return entry.to_response()
+        
+        if response.status_code == 200:
+            self.cache.put(key, response)
+        return response
+    
+    def _send(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send through the shared rate-limit scheduler, retrying rate limits with backoff."""
+        resource = self._resource_for(url)
+        
+        def send() -> httpx.Response:
+            self.scheduler.acquire(resource)
+            response = self.client.request(method, url, **kwargs)
+            self.scheduler.observe(resource, response)
+            return response
+        
+        return Retrying(**self._retry_policy())(send)
+    
+    async def _send_async(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Async counterpart of ``_send`` on the shared async client."""
+        resource = self._resource_for(url)
+        
+        async def send() -> httpx.Response:
+            await self.scheduler.acquire_async(resource)
+            response = await self._get_async_client().request(method, url, **kwargs)
+            self.scheduler.observe(resource, response)
+            return response
+        
+        return await AsyncRetrying(**self._retry_policy())(send)
+    
+    def _get(self, url: str, **kwargs) -> httpx.Response:
+        """GET through the response cache; 304s are served from the cached body."""
+        key, entry, fresh = self._check_cache(url, kwargs)
+        if fresh is not None:
+            return fresh
+        response = self._send("GET", url, **kwargs)
+        return self._update_cache(key, entry, response)
+    
+    async def _get_async(self, url: str, **kwargs) -> httpx.Response:
+        """Async counterpart of ``_get``."""
+        key, entry, fresh = self._check_cache(url, kwargs)
+        if fresh is not None:
+            return fresh
+        response = await self._send_async("GET", url, **kwargs)
+        return self._update_cache(key, entry, response)
+    
+    def _parse_repo(self, owner: str, repo: str, response: httpx.Response) -> Optional[Dict[str, Any]]:
+        """Convert a repository API response into our metadata dict."""
+        if response.status_code == 200:
+            data = response.json()
+            return {
+                "full_name": data["full_name"],
+                "name": data["name"],
+                "description": data.get("description") or "",
+                "stars": data["stargazers_count"],
+                "forks": data["forks_count"],
+                "language": data.get("language") or "Unknown",
+                "url": data["html_url"],
+                "owner": data["owner"]["login"],
+                "topics": data.get("topics", [])
+            }
+        else:
+            print(f"Failed to fetch {owner}/{repo}: {response.status_code}")
+            return None
+    
+    def _parse_readme(self, response: httpx.Response) -> str:
+        """Extract README text from a raw contents response."""
+        if response.status_code == 200:
+            return response.text[:2000]  # Limit to first 2000 chars
+        else:
+            return ""
+    
+    def _parse_requirements(self, response: httpx.Response) -> List[str]:
+        """Extract package names from a raw requirements.txt response."""
+        if response.status_code == 200:
+            return self._parse_requirements_text(response.text)
+        return []
+    
+    def _parse_requirements_text(self, text: str) -> List[str]:
+        """Extract package names from requirements.txt content."""
+        deps = []
+        
+        for line in text.split("\n"):
+            line = line.strip()
+            if line and not line.startswith("#"):
+                # Extract package name (before ==, >=, etc)
+                pkg = line.split("==")[0].split(">=")[0].split("<=")[0].split("[")[0].strip()
+                if pkg:
+                    deps.append(pkg.lower())
+        
+        return deps[:20]  # Limit to 20 dependencies
     
     def fetch_repo(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
         """Fetch a single repository's data."""
         url = f"{self.BASE_URL}/repos/{owner}/{repo}"
-        
-        with httpx.Client() as client:
-            response = client.get(url, headers=self.headers)
-            
-            if response.status_code == 200:
-                data = response.json()
-                return {
-                    "full_name": data["full_name"],
-                    "name": data["name"],
-                    "description": data.get("description") or "",
-                    "stars": data["stargazers_count"],
-                    "forks": data["forks_count"],
-                    "language": data.get("language") or "Unknown",
-                    "url": data["html_url"],
-                    "owner": data["owner"]["login"],
-                    "topics": data.get("topics", [])
-                }
-            else:
-                print(f"Failed to fetch {owner}/{repo}: {response.status_code}")
-                return None
+        response = self._get(url)
+        return self._parse_repo(owner, repo, response)
     
     def fetch_readme(self, owner: str, repo: str) -> str:
         """Fetch repository README content."""
         url = f"{self.BASE_URL}/repos/{owner}/{repo}/readme"
-        
-        with httpx.Client() as client:
-            response = client.get(url, headers={**self.headers, "Accept": "application/vnd.github.raw"})
-            
-            if response.status_code == 200:
-                return response.text[:2000]  # Limit to first 2000 chars
-            else:
-                return ""
+        response = self._get(url, headers=self.raw_headers)
+        return self._parse_readme(response)
     
     def fetch_dependencies(self, owner: str, repo: str) -> List[str]:
         """Fetch dependencies from requirements.txt or pyproject.toml."""
-        deps = []
-        
         # Try requirements.txt
         url = f"{self.BASE_URL}/repos/{owner}/{repo}/contents/requirements.txt"
-        with httpx.Client() as client:
-            response = client.get(url, headers={**self.headers, "Accept": "application/vnd.github.raw"})
+        response = self._get(url, headers=self.raw_headers)
+        return self._parse_requirements(response)
+    
+    def _get_async_client(self) -> httpx.AsyncClient:
+        """Return the shared async client, creating it on first use."""
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                transport=self._async_transport,
+            )
+        return self._async_client
+    
+    async def aclose(self) -> None:
+        """Close the shared async client."""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+    
+    async def fetch_repo_async(self, owner: str, repo: str) -> Optional[Dict[str, Any]]:
+        """Fetch a single repository's data on the shared async client."""
+        url = f"{self.BASE_URL}/repos/{owner}/{repo}"
+        response = await self._get_async(url)
+        return self._parse_repo(owner, repo, response)
+    
+    async def fetch_readme_async(self, owner: str, repo: str) -> str:
+        """Fetch repository README content on the shared async client."""
+        url = f"{self.BASE_URL}/repos/{owner}/{repo}/readme"
+        response = await self._get_async(url, headers=self.raw_headers)
+        return self._parse_readme(response)
+    
+    async def fetch_dependencies_async(self, owner: str, repo: str) -> List[str]:
+        """Fetch dependencies from requirements.txt on the shared async client."""
+        url = f"{self.BASE_URL}/repos/{owner}/{repo}/contents/requirements.txt"
+        response = await self._get_async(url, headers=self.raw_headers)
+        return self._parse_requirements(response)
+    
+    def _graphql_query(self, full_names: List[str]) -> tuple:
+        """Build one aliased GraphQL query (and its variables) covering every repo."""
+        blob_fields = "\n".join(
+            f'readme{i}: object(expression: "HEAD:{path}") {{ ... on Blob {{ text }} }}'
+            for i, path in enumerate(self.README_PATHS)
+        )
+        fragment = f"""
+            fragment RepoFields on Repository {{
+                nameWithOwner
+                name
+                description
+                stargazerCount
+                forkCount
+                url
+                owner {{ login }}
+                primaryLanguage {{ name }}
+                repositoryTopics(first: 20) {{ nodes {{ topic {{ name }} }} }}
+                {blob_fields}
+                requirements: object(expression: "HEAD:requirements.txt") {{ ... on Blob {{ text }} }}
+            }}
+        """
+        
+        params, selections, variables = [], [], {}
+        for i, full_name in enumerate(full_names):
+            owner, repo = full_name.split("/")
+            params.append(f"$o{i}: String!, $n{i}: String!")
+            selections.append(f"r{i}: repository(owner: $o{i}, name: $n{i}) {{ ...RepoFields }}")
+            variables[f"o{i}"] = owner
+            variables[f"n{i}"] = repo
+        
+        query = f"query({', '.join(params)}) {{\n{chr(10).join(selections)}\n}}\n{fragment}"
+        return query, variables
+    
+    def _parse_graphql_batch(self, full_names: List[str], response: httpx.Response) -> Dict[str, Dict[str, Any]]:
+        """Map a batch response onto the shapes returned by the per-repo REST methods."""
+        if response.status_code != 200:
+            print(f"GraphQL batch failed: {response.status_code}")
+            return {}
+        
+        payload = response.json()
+        data = payload.get("data") or {}
+        for error in payload.get("errors", []):
+            print(f"GraphQL error: {error.get('message')}")
+        
+        results = {}
+        for i, full_name in enumerate(full_names):
+            node = data.get(f"r{i}")
+            if not node:
+                print(f"Failed to fetch {full_name}: not found")
+                continue
+            
+            readme = ""
+            for j in range(len(self.README_PATHS)):
+                blob = node.get(f"readme{j}")
+                if blob and blob.get("text"):
+                    readme = blob["text"][:2000]  # Limit to first 2000 chars
+                    break
             
-            if response.status_code == 200:
-                for line in response.text.split("\n"):
-                    line = line.strip()
-                    if line and not line.startswith("#"):
-                        # Extract package name (before ==, >=, etc)
-                        pkg = line.split("==")[0].split(">=")[0].split("<=")[0].split("[")[0].strip()
-                        if pkg:
-                            deps.append(pkg.lower())
+            requirements = node.get("requirements") or {}
+            results[full_name] = {
+                "repo": {
+                    "full_name": node["nameWithOwner"],
+                    "name": node["name"],
+                    "description": node.get("description") or "",
+                    "stars": node["stargazerCount"],
+                    "forks": node["forkCount"],
+                    "language": (node.get("primaryLanguage") or {}).get("name") or "Unknown",
+                    "url": node["url"],
+                    "owner": node["owner"]["login"],
+                    "topics": [t["topic"]["name"] for t in node["repositoryTopics"]["nodes"]]
+                },
+                "readme": readme,
+                "dependencies": self._parse_requirements_text(requirements.get("text") or "")
+            }
         
-        return deps[:20]  # Limit to 20 dependencies
+        return results
+    
+    def _graphql_batches(self, full_names: List[str]) -> List[List[str]]:
+        """Split valid ``owner/repo`` names into GraphQL-sized batches."""
+        valid = []
+        for full_name in full_names:
+            if len(full_name.split("/")) == 2:
+                valid.append(full_name)
+            else:
+                print(f"Invalid repo name: {full_name}")
+        
+        size = settings.GITHUB_GRAPHQL_BATCH_SIZE
+        return [valid[i:i + size] for i in range(0, len(valid), size)]
     
-    def fetch_awesome_list(self, list_url: str) -> List[str]:
-        """Fetch repos from an awesome list."""
-        repos = []
+    def fetch_repos_batch(self, full_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Fetch metadata, README and dependencies for many repos via GraphQL.
         
-        # Parse owner/repo from URL
+        Returns ``{full_name: {"repo": ..., "readme": ..., "dependencies": ...}}`` with
+        the same values as ``fetch_repo``, ``fetch_readme`` and ``fetch_dependencies``.
+        Repos that could not be fetched are left out.
+        """
+        results = {}
+        for batch in self._graphql_batches(full_names):
+            query, variables = self._graphql_query(batch)
+            response = self._send("POST", self.GRAPHQL_URL, json={"query": query, "variables": variables})
+            results.update(self._parse_graphql_batch(batch, response))
+        return results
+    
+    async def fetch_repos_batch_async(self, full_names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Async counterpart of ``fetch_repos_batch`` on the shared async client."""
+        results = {}
+        for batch in self._graphql_batches(full_names):
+            query, variables = self._graphql_query(batch)
+            response = await self._send_async("POST", self.GRAPHQL_URL, json={"query": query, "variables": variables})
+            results.update(self._parse_graphql_batch(batch, response))
+        return results
+    
+    def iter_pages(self, url: str, params: Optional[Dict[str, Any]] = None) -> Iterator[Any]:
+        """Yield the JSON body of each page of a paginated endpoint, following ``Link: rel="next"``."""
+        while url:
+            response = self._get(url, params=params)
+            if response.status_code != 200:
+                print(f"Request failed: {response.status_code} {url}")
+                return
+            yield response.json()
+            # The next link already carries the query string
+            url = response.links.get("next", {}).get("url")
+            params = None
+    
+    def iter_awesome_list(self, list_url: str) -> Iterator[str]:
+        """Stream the repos linked from an awesome list's README, in order and without duplicates."""
         parts = list_url.replace("https://github.com/", "").split("/")
-        if len(parts) >= 2:
-            owner, repo = parts[0], parts[1]
-            
-            url = f"{self.BASE_URL}/repos/{owner}/{repo}/readme"
-            with httpx.Client() as client:
-                response = client.get(url, headers={**self.headers, "Accept": "application/vnd.github.raw"})
-                
-                if response.status_code == 200:
-                    # Extract GitHub repo links from README
-                    import re
-                    pattern = r'github\.com/([a-zA-Z0-9_-]+/[a-zA-Z0-9_-]+)'
-                    matches = re.findall(pattern, response.text)
-                    repos = list(set(matches))[:50]  # Limit to 50 repos
-        
-        return repos
+        if len(parts) < 2:
+            return
+        owner, repo = parts[0], parts[1]
+        
+        response = self._get(f"{self.BASE_URL}/repos/{owner}/{repo}/readme", headers=self.raw_headers)
+        if response.status_code != 200:
+            print(f"Awesome list fetch failed: {response.status_code}")
+            return
+        
+        seen = SeenSet()
+        seen.add(f"{owner}/{repo}")
+        for match in _REPO_LINK.finditer(response.text):
+            link_owner, link_repo = match.group(1), match.group(2).rstrip(".")
+            if link_repo.endswith(".git"):
+                link_repo = link_repo[:-4]
+            if link_owner.lower() in _NON_REPO_OWNERS or not link_repo:
+                continue
+            full_name = f"{link_owner}/{link_repo}"
+            if seen.add(full_name):
+                yield full_name
     
-    def search_repos(self, query: str, language: str = "python", limit: int = 30) -> List[str]:
-        """Search for repos on GitHub."""
+    def fetch_awesome_list(self, list_url: str, limit: int = 50) -> List[str]:
+        """Fetch up to ``limit`` repos from an awesome list, in README order."""
+        return list(islice(self.iter_awesome_list(list_url), limit))
+    
+    def iter_search_repos(
+        self,
+        query: str,
+        language: Optional[str] = "python",
+        limit: Optional[int] = None,
+        min_stars: int = 0,
+        per_page: int = 100,
+    ) -> Iterator[str]:
+        """Stream repo names for a search, most-starred first, across every result page.
+        
+        ``limit=None`` streams every result; any other value caps how many are yielded.
+        GitHub serves at most ``SEARCH_RESULT_CAP`` results per search. Once a capped
+        window runs out, the search is repeated for star counts up to the lowest one
+        seen so far; the overlap is dropped by the seen-set.
+        """
+        if limit is not None and limit <= 0:
+            return
+        per_page = max(min(per_page, 100), 1)
         url = f"{self.BASE_URL}/search/repositories"
-        params = {
-            "q": f"{query} language:{language}",
-            "sort": "stars",
-            "order": "desc",
-            "per_page": limit
-        }
+        seen = SeenSet()
+        yielded = 0
+        max_stars: Optional[int] = None
         
-        with httpx.Client() as client:
-            response = client.get(url, headers=self.headers, params=params)
+        while True:
+            qualifiers = [query]
+            if language:
+                qualifiers.append(f"language:{language}")
+            if max_stars is not None:
+                qualifiers.append(f"stars:{min_stars}..{max_stars}")
+            elif min_stars:
+                qualifiers.append(f"stars:>={min_stars}")
+            params = {"q": " ".join(qualifiers), "sort": "stars", "order": "desc", "per_page": per_page}
             
-            if response.status_code == 200:
-                data = response.json()
-                return [item["full_name"] for item in data.get("items", [])]
-            else:
-                print(f"Search failed: {response.status_code}")
-                return []
-
+            window, total, lowest = 0, 0, None
+            for page in self.iter_pages(url, params):
+                total = page.get("total_count", 0)
+                for item in page.get("items", []):
+                    window += 1
+                    lowest = item["stargazers_count"]
+                    if seen.add(item["full_name"]):
+                        yield item["full_name"]
+                        yielded += 1
+                        if limit is not None and yielded >= limit:
+                            return
+            
+            if lowest is None or window < self.SEARCH_RESULT_CAP or total <= window:
+                return
+            # A full window of repos tied on stars cannot be sliced further; skip past the tie
+            max_stars = lowest - 1 if lowest == max_stars else lowest
+            if max_stars < min_stars:
+                return
+    
+    def search_repos(self, query: str, language: str = "python", limit: int = 30) -> List[str]:
+        """Search for repos on GitHub."""
+        return list(self.iter_search_repos(query, language, limit=limit, per_page=limit))
 
 github_fetcher = GitHubFetcher()
@@ -0,0 +1,196 @@
+"""Persistent, resumable work queue for ingestion jobs."""
+
+import os
+import random
+import socket
+import sqlite3
+import time
+from contextlib import contextmanager
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from config import settings
+from utils.sqlite_store import SQLiteStore
+
+
+PENDING = "pending"
+FETCHED = "fetched"
+EMBEDDED = "embedded"
+WRITTEN = "written"
+# Gave up after INGEST_MAX_ATTEMPTS
+FAILED = "failed"
+
+
+def worker_id() -> str:
+    """Identifies this process's claims; unique across the hosts sharing a queue."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobQueue(SQLiteStore):
+    """SQLite queue of repos with per-repo state that several worker processes can drain at once.
+    
+    Each repo moves pending -> fetched -> embedded -> written. Workers claim small
+    batches under a lease that every state change renews; when a worker dies its
+    lease runs out and the repos become claimable again. Failed repos are retried
+    with exponential backoff, then parked as failed after ``max_attempts``.
+    """
+    
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS jobs (
+            full_name TEXT PRIMARY KEY,
+            state TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL DEFAULT 0,
+            worker TEXT,
+            lease_until REAL NOT NULL DEFAULT 0,
+            error TEXT,
+            updated_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (state, next_attempt_at)",
+    )
+    
+    def __init__(
+        self,
+        path: str,
+        lease_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+        retry_base_seconds: Optional[float] = None,
+        retry_max_seconds: Optional[float] = None,
+    ):
+        super().__init__(path)
+        self.lease_seconds = lease_seconds or settings.INGEST_LEASE_SECONDS
+        self.max_attempts = max_attempts or settings.INGEST_MAX_ATTEMPTS
+        self.retry_base_seconds = retry_base_seconds if retry_base_seconds is not None else settings.INGEST_RETRY_BASE_SECONDS
+        self.retry_max_seconds = retry_max_seconds if retry_max_seconds is not None else settings.INGEST_RETRY_MAX_SECONDS
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction that takes the database lock up front, so claims never race."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+    
+    def enqueue(self, full_names: Iterable[str]) -> int:
+        """Add repos as pending; repos already in the queue keep their state. Returns how many were new.
+        
+        Names are committed in batches, so workers can start on a crawl that is still running.
+        """
+        names = iter(full_names)
+        added = 0
+        while True:
+            batch = list(islice(names, settings.INGEST_CLAIM_BATCH))
+            if not batch:
+                return added
+            now = time.time()
+            with self._transaction() as conn:
+                before = conn.total_changes
+                conn.executemany(
+                    "INSERT OR IGNORE INTO jobs (full_name, state, updated_at) VALUES (?, ?, ?)",
+                    [(full_name, PENDING, now) for full_name in batch],
+                )
+                added += conn.total_changes - before
+    
+    def claim(self, worker: str, limit: Optional[int] = None) -> List[str]:
+        """Lease up to ``limit`` unfinished repos that are due and not held by another worker."""
+        now = time.time()
+        with self._transaction() as conn:
+            names = [row[0] for row in conn.execute("""
+                SELECT full_name FROM jobs
+                WHERE state NOT IN (?, ?) AND next_attempt_at <= ? AND lease_until <= ?
+                ORDER BY rowid LIMIT ?
+            """, (WRITTEN, FAILED, now, now, limit or settings.INGEST_CLAIM_BATCH))]
+            conn.executemany(
+                "UPDATE jobs SET worker = ?, lease_until = ? WHERE full_name = ?",
+                [(worker, now + self.lease_seconds, full_name) for full_name in names],
+            )
+        return names
+    
+    def drain(self, worker: str, batch_size: Optional[int] = None) -> Iterator[str]:
+        """Yield claimable repos batch by batch until none are due; claims happen as the caller pulls."""
+        while True:
+            names = self.claim(worker, batch_size)
+            if not names:
+                return
+            yield from names
+    
+    def advance(self, full_names: List[str], state: str) -> None:
+        """Record progress; finishing a repo releases it, any other state renews its lease."""
+        if not full_names:
+            return
+        now = time.time()
+        with self._transaction() as conn:
+            if state == WRITTEN:
+                conn.executemany(
+                    "UPDATE jobs SET state = ?, worker = NULL, lease_until = 0, error = NULL, updated_at = ? WHERE full_name = ?",
+                    [(state, now, full_name) for full_name in full_names],
+                )
+            else:
+                conn.executemany(
+                    "UPDATE jobs SET state = ?, lease_until = ?, updated_at = ? WHERE full_name = ?",
+                    [(state, now + self.lease_seconds, now, full_name) for full_name in full_names],
+                )
+    
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_base_seconds * 2 ** (attempts - 1), self.retry_max_seconds)
+        return delay + random.uniform(0, delay * 0.1)
+    
+    def fail_unfinished(self, worker: str, error: str) -> int:
+        """Schedule a retry for every repo ``worker`` still holds; returns how many there were."""
+        now = time.time()
+        with self._transaction() as conn:
+            rows = conn.execute("SELECT full_name, attempts FROM jobs WHERE worker = ?", (worker,)).fetchall()
+            updates = []
+            for full_name, attempts in rows:
+                attempts += 1
+                exhausted = attempts >= self.max_attempts
+                updates.append((
+                    FAILED if exhausted else None,
+                    attempts,
+                    now if exhausted else now + self._backoff(attempts),
+                    error,
+                    now,
+                    full_name,
+                ))
+            conn.executemany("""
+                UPDATE jobs SET state = coalesce(?, state), attempts = ?, next_attempt_at = ?,
+                    worker = NULL, lease_until = 0, error = ?, updated_at = ?
+                WHERE full_name = ?
+            """, updates)
+        return len(rows)
+    
+    def next_retry_at(self) -> Optional[float]:
+        """When the next unfinished repo becomes claimable, or None if every repo is finished.
+        
+        Repos leased by another worker count from the end of that lease, so a crashed
+        worker's repos are picked up once it runs out.
+        """
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT min(max(next_attempt_at, lease_until)) FROM jobs WHERE state NOT IN (?, ?)",
+                (WRITTEN, FAILED),
+            ).fetchone()
+        return row[0]
+    
+    def wait_for_retry(self) -> bool:
+        """Block until some unfinished repo is claimable; False once every repo is written or failed."""
+        retry_at = self.next_retry_at()
+        if retry_at is not None and retry_at > time.time():
+            print(f"Waiting up to {retry_at - time.time():.0f}s for the next retry...")
+        # Poll, since other workers may finish or release repos in the meantime
+        while retry_at is not None and retry_at > time.time():
+            time.sleep(min(retry_at - time.time(), settings.INGEST_RETRY_BASE_SECONDS))
+            retry_at = self.next_retry_at()
+        return retry_at is not None
+    
+    def counts(self) -> Dict[str, int]:
+        """Number of repos in each state."""
+        with self._lock:
+            rows = self._connect().execute("SELECT state, count(*) FROM jobs GROUP BY state").fetchall()
+        return dict(rows)
@@ -0,0 +1,93 @@
+"""Per-repo content fingerprints for incremental re-ingestion."""
+
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from utils.sqlite_store import SQLiteStore
+
+# Repo fields that end up in the graph node or the vector metadata
+_METADATA_FIELDS = ("name", "description", "stars", "forks", "language", "url", "topics")
+
+
+def _digest(value: Any) -> str:
+    return hashlib.blake2b(json.dumps(value, sort_keys=True).encode("utf-8"), digest_size=16).hexdigest()
+
+
+@dataclass
+class Fingerprint:
+    """Hashes of the three independently changing parts of a repo."""
+    readme: str
+    deps: str
+    metadata: str
+    
+    @classmethod
+    def of(cls, repo_data: Dict[str, Any], readme: str, deps: List[str]) -> "Fingerprint":
+        return cls(
+            readme=_digest(readme),
+            deps=_digest(sorted(set(deps))),
+            metadata=_digest({field: repo_data.get(field) for field in _METADATA_FIELDS}),
+        )
+
+
+@dataclass
+class Changes:
+    """What differs between a freshly fetched repo and its last ingested fingerprint."""
+    fingerprint: Fingerprint
+    new: bool
+    readme: bool
+    deps: bool
+    metadata: bool
+    
+    @property
+    def unchanged(self) -> bool:
+        return not (self.new or self.readme or self.deps or self.metadata)
+
+
+class IngestManifest(SQLiteStore):
+    """SQLite table of the fingerprint each repo had when it was last written."""
+    
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS repos (
+            full_name TEXT PRIMARY KEY,
+            readme_hash TEXT NOT NULL,
+            deps_hash TEXT NOT NULL,
+            metadata_hash TEXT NOT NULL,
+            ingested_at REAL NOT NULL
+        )
+        """,
+    )
+    
+    def get(self, full_name: str) -> Optional[Fingerprint]:
+        """The fingerprint recorded for ``full_name``, or None if it was never ingested."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT readme_hash, deps_hash, metadata_hash FROM repos WHERE full_name = ?", (full_name,)
+            ).fetchone()
+        return Fingerprint(*row) if row else None
+    
+    def diff(self, full_name: str, repo_data: Dict[str, Any], readme: str, deps: List[str]) -> Changes:
+        """Compare a fetched repo against its recorded fingerprint."""
+        current = Fingerprint.of(repo_data, readme, deps)
+        previous = self.get(full_name)
+        if previous is None:
+            return Changes(current, new=True, readme=True, deps=True, metadata=True)
+        return Changes(
+            current,
+            new=False,
+            readme=current.readme != previous.readme,
+            deps=current.deps != previous.deps,
+            metadata=current.metadata != previous.metadata,
+        )
+    
+    def record(self, entries: Dict[str, Fingerprint]) -> None:
+        """Store fingerprints for repos that were written successfully."""
+        now = time.time()
+        with self._lock:
+            self._connect().executemany(
+                "INSERT OR REPLACE INTO repos VALUES (?, ?, ?, ?, ?)",
+                [(full_name, f.readme, f.deps, f.metadata, now) for full_name, f in entries.items()],
+            )
@@ -0,0 +1,364 @@
+"""Async ingestion pipeline: fetch, embed, then write with bounded concurrency per stage."""
+
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+from config import settings
+from db import pinecone_client, neo4j_client
+from db.packages import package_for
+from .github_fetcher import github_fetcher
+from .job_queue import EMBEDDED, FETCHED, WRITTEN, JobQueue
+from .manifest import IngestManifest
+
+
+# Marks the end of a stage's input; each worker puts it back for its siblings
+_DONE = object()
+
+
+def repo_vector_metadata(repo_data: Dict[str, Any], deps: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Build the Pinecone metadata stored alongside a repo's README vector.
+    
+    Topics and canonical dependency names are stored as lists so searches can filter on them.
+    """
+    return {
+        "name": repo_data["name"],
+        "description": repo_data["description"],
+        "stars": repo_data["stars"],
+        "forks": repo_data.get("forks", 0),
+        "language": repo_data["language"],
+        "topics": repo_data.get("topics", []),
+        "dependencies": sorted({package_for(dep) for dep in deps or []}),
+        "url": repo_data["url"]
+    }
+
+
+def _changed(item: Dict[str, Any], part: str) -> bool:
+    """Whether ``part`` of a fetched repo needs writing; always true outside incremental mode."""
+    changes = item.get("changes")
+    return changes is None or getattr(changes, part)
+
+
+@dataclass
+class StageStats:
+    """Counters for one pipeline stage."""
+    name: str
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    
+    @property
+    def elapsed(self) -> float:
+        """Wall-clock seconds between the stage starting and draining."""
+        return max(self.finished_at - self.started_at, 0.0)
+    
+    @property
+    def throughput(self) -> float:
+        """Items completed per wall-clock second."""
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+class IngestionPipeline:
+    """Ingest repos through fetch -> embed -> write stages connected by bounded queues.
+    
+    With a ``manifest``, fetched repos are compared against their last ingested
+    fingerprints: unchanged repos are dropped after the fetch, READMEs are only
+    re-embedded when they changed, and dependency edges are rewritten only when
+    the dependency list changed. With a ``queue``, each repo's progress is
+    recorded in the job queue as it moves through the stages.
+    """
+    
+    def __init__(
+        self,
+        fetcher=github_fetcher,
+        vector_client=pinecone_client,
+        graph_client=neo4j_client,
+        fetch_concurrency: Optional[int] = None,
+        embed_concurrency: Optional[int] = None,
+        write_concurrency: Optional[int] = None,
+        graphql: bool = False,
+        manifest: Optional[IngestManifest] = None,
+        queue: Optional[JobQueue] = None,
+    ):
+        self.fetcher = fetcher
+        self.vector_client = vector_client
+        self.graph_client = graph_client
+        self.fetch_concurrency = fetch_concurrency or settings.INGEST_FETCH_CONCURRENCY
+        self.embed_concurrency = embed_concurrency or settings.INGEST_EMBED_CONCURRENCY
+        self.write_concurrency = write_concurrency or settings.INGEST_WRITE_CONCURRENCY
+        self.graphql = graphql
+        self.manifest = manifest
+        self.queue = queue
+        self.skipped = 0
+        self.stats: Dict[str, StageStats] = {
+            "fetch": StageStats("fetch"),
+            "embed": StageStats("embed"),
+            "write": StageStats("write"),
+        }
+    
+    async def run(self, full_names: Iterable[str]) -> int:
+        """Ingest every repo name and return how many were written successfully.
+        
+        ``full_names`` is consumed lazily, so it can be a generator that is still crawling.
+        """
+        fetch_queue: asyncio.Queue = asyncio.Queue(self.fetch_concurrency * 2)
+        # Room for every worker to assemble a full batch
+        embed_queue: asyncio.Queue = asyncio.Queue(self.embed_concurrency * settings.EMBED_BATCH_SIZE)
+        write_queue: asyncio.Queue = asyncio.Queue(self.write_concurrency * settings.PINECONE_UPSERT_BATCH_SIZE)
+        
+        async def names():
+            # Sources can be crawlers or job queues that block, so pull them off the event loop
+            iterator = iter(full_names)
+            while True:
+                full_name = await asyncio.to_thread(next, iterator, _DONE)
+                if full_name is _DONE:
+                    return
+                yield full_name
+        
+        async def feed():
+            try:
+                if self.graphql:
+                    # Each fetch item is a whole GraphQL batch of names
+                    batch = []
+                    async for full_name in names():
+                        batch.append(full_name)
+                        if len(batch) == settings.GITHUB_GRAPHQL_BATCH_SIZE:
+                            await fetch_queue.put(batch)
+                            batch = []
+                    if batch:
+                        await fetch_queue.put(batch)
+                else:
+                    async for full_name in names():
+                        await fetch_queue.put(full_name)
+            finally:
+                await fetch_queue.put(_DONE)
+        
+        fetch = self._fetch_batch if self.graphql else self._fetch
+        
+        try:
+            await asyncio.gather(
+                feed(),
+                self._run_stage(self.stats["fetch"], fetch, fetch_queue, embed_queue, self.fetch_concurrency),
+                self._run_stage(
+                    self.stats["embed"], self._embed, embed_queue, write_queue, self.embed_concurrency,
+                    batch_size=settings.EMBED_BATCH_SIZE,
+                ),
+                self._run_stage(
+                    self.stats["write"], self._write, write_queue, None, self.write_concurrency,
+                    batch_size=settings.PINECONE_UPSERT_BATCH_SIZE,
+                ),
+            )
+        finally:
+            await self.fetcher.aclose()
+        
+        return self.stats["write"].processed
+    
+    async def _run_stage(
+        self,
+        stats: StageStats,
+        handler: Callable[[Any], Awaitable[Any]],
+        inbox: asyncio.Queue,
+        outbox: Optional[asyncio.Queue],
+        concurrency: int,
+        batch_size: int = 1,
+    ) -> None:
+        """Drain ``inbox`` with ``concurrency`` workers, forwarding results to ``outbox``.
+        
+        With ``batch_size > 1`` the handler receives a list of up to ``batch_size``
+        items, collected for at most ``INGEST_BATCH_LINGER_SECONDS``.
+        """
+        stats.started_at = time.perf_counter()
+        
+        async def next_batch() -> Any:
+            first = await inbox.get()
+            if first is _DONE or batch_size == 1:
+                return first
+            
+            batch = [first]
+            deadline = time.perf_counter() + settings.INGEST_BATCH_LINGER_SECONDS
+            while len(batch) < batch_size:
+                try:
+                    item = inbox.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(inbox.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if item is _DONE:
+                    await inbox.put(_DONE)
+                    break
+                batch.append(item)
+            return batch
+        
+        async def worker():
+            while True:
+                item = await next_batch()
+                if item is _DONE:
+                    await inbox.put(_DONE)
+                    return
+                
+                started = time.perf_counter()
+                try:
+                    result = await handler(item)
+                except Exception as e:
+                    print(f"  [{stats.name}] failed: {e}")
+                    result = None
+                stats.busy_seconds += time.perf_counter() - started
+                
+                if result is None:
+                    stats.failed += len(item) if batch_size > 1 else 1
+                    continue
+                
+                # Batch handlers fan out into one downstream item per repo
+                results = result if isinstance(result, list) else [result]
+                stats.processed += len(results)
+                if outbox is not None:
+                    for result in results:
+                        await outbox.put(result)
+        
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        stats.finished_at = time.perf_counter()
+        
+        if outbox is not None:
+            await outbox.put(_DONE)
+    
+    def _advance(self, items: List[Dict[str, Any]], state: str) -> None:
+        """Record the repos' progress in the job queue, if there is one."""
+        if self.queue is not None:
+            self.queue.advance([item["full_name"] for item in items], state)
+    
+    def _plan(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """In incremental mode, attach each repo's changes and drop the unchanged ones."""
+        if self.manifest is None:
+            self._advance(items, FETCHED)
+            return items
+        
+        changed, unchanged = [], []
+        for item in items:
+            item["changes"] = self.manifest.diff(item["full_name"], item["repo_data"], item["readme"], item["deps"])
+            (unchanged if item["changes"].unchanged else changed).append(item)
+        self.skipped += len(unchanged)
+        self._advance(unchanged, WRITTEN)
+        self._advance(changed, FETCHED)
+        return changed
+    
+    async def _fetch(self, full_name: str) -> Optional[List[Dict[str, Any]]]:
+        """Fetch metadata, then README and dependencies concurrently."""
+        parts = full_name.split("/")
+        if len(parts) != 2:
+            print(f"Invalid repo name: {full_name}")
+            return None
+        
+        owner, repo = parts
+        repo_data = await self.fetcher.fetch_repo_async(owner, repo)
+        if not repo_data:
+            return None
+        
+        readme, deps = await asyncio.gather(
+            self.fetcher.fetch_readme_async(owner, repo),
+            self.fetcher.fetch_dependencies_async(owner, repo),
+        )
+        
+        return self._plan([{
+            "full_name": full_name,
+            "repo_data": repo_data,
+            "readme": readme or repo_data.get("description", ""),
+            "deps": deps,
+        }])
+    
+    async def _fetch_batch(self, full_names: List[str]) -> List[Dict[str, Any]]:
+        """Fetch a whole batch of repos with one GraphQL query."""
+        fetched = await self.fetcher.fetch_repos_batch_async(full_names)
+        
+        items = []
+        for full_name, entry in fetched.items():
+            repo_data = entry["repo"]
+            items.append({
+                "full_name": full_name,
+                "repo_data": repo_data,
+                "readme": entry["readme"] or repo_data.get("description", ""),
+                "deps": entry["dependencies"],
+            })
+        self.stats["fetch"].failed += len(full_names) - len(items)
+        return self._plan(items)
+    
+    async def _embed(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Embed a batch of changed READMEs in one request, off the event loop.
+        
+        Repos whose README could not be embedded are dropped; the rest of the batch goes on.
+        An unchanged README is embedded anyway when its vector is missing from the index.
+        """
+        pending = [item for item in items if _changed(item, "readme")]
+        kept = [item for item in items if not _changed(item, "readme")]
+        if kept:
+            missing = set(await asyncio.to_thread(self.vector_client.missing_ids, [item["full_name"] for item in kept]))
+            pending.extend(item for item in kept if item["full_name"] in missing)
+        if pending:
+            vectors = await asyncio.to_thread(self.vector_client.embed_batch, [item["readme"] for item in pending])
+            failed = set()
+            for item, vector in zip(pending, vectors):
+                if vector is None:
+                    failed.add(item["full_name"])
+                else:
+                    item["vector"] = vector
+            if failed:
+                print(f"  [embed] failed: {', '.join(sorted(failed))}")
+                self.stats["embed"].failed += len(failed)
+                items = [item for item in items if item["full_name"] not in failed]
+        self._advance(items, EMBEDDED)
+        return items
+    
+    async def _write(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write a batch of vector and graph records off the event loop."""
+        written = await asyncio.to_thread(self._write_sync, items)
+        self.stats["write"].failed += len(items) - len(written)
+        for item in written:
+            print(f"  Ingested: {item['full_name']}")
+        return written
+    
+    def _write_sync(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Write fetched and embedded repos to both stores; returns the ones written.
+        
+        Repos whose README did not change keep their vector and only get new metadata.
+        """
+        failed = set(self.vector_client.upsert_vectors([
+            (item["full_name"], item["vector"], repo_vector_metadata(item["repo_data"], item["deps"]))
+            for item in items if "vector" in item
+        ]))
+        failed.update(self.vector_client.update_metadata([
+            (item["full_name"], repo_vector_metadata(item["repo_data"], item["deps"]))
+            for item in items if "vector" not in item
+        ]))
+        
+        written = [item for item in items if item["full_name"] not in failed]
+        self.graph_client.create_repo_nodes([
+            (item["full_name"], item["repo_data"]) for item in written if _changed(item, "metadata")
+        ])
+        rewired = [item for item in written if _changed(item, "deps")]
+        self.graph_client.prune_dependencies([(item["full_name"], item["deps"]) for item in rewired])
+        self.graph_client.create_dependencies([
+            (item["full_name"], dep) for item in rewired for dep in item["deps"]
+        ])
+        
+        if self.manifest is not None:
+            self.manifest.record({item["full_name"]: item["changes"].fingerprint for item in written})
+        self._advance(written, WRITTEN)
+        return written
+    
+    def print_stats(self) -> None:
+        """Print per-stage throughput."""
+        print("\nPipeline stages:")
+        for stats in self.stats.values():
+            print(
+                f"  {stats.name:6} {stats.processed:5} ok {stats.failed:4} failed "
+                f"{stats.throughput:8.2f} repos/s  (busy {stats.busy_seconds:.1f}s, wall {stats.elapsed:.1f}s)"
+            )
+        if self.manifest is not None:
+            print(f"  {self.skipped} unchanged repos skipped")
+
@@ -0,0 +1,161 @@
+"""Rate-limit-aware scheduler for GitHub API calls."""
+
+import asyncio
+import threading
+import time
+from typing import Dict, Optional
+
+import httpx
+from tenacity import wait_exponential
+
+from config import settings
+
+
+# GitHub asks clients to wait at least a minute after a secondary limit without Retry-After
+SECONDARY_LIMIT_WAIT = 60.0
+
+
+class RateLimitExceeded(Exception):
+    """Raised when GitHub rejects a request for exceeding a rate limit."""
+    
+    def __init__(self, response: httpx.Response, retry_after: float):
+        super().__init__(f"GitHub rate limit hit ({response.status_code}), retry in {retry_after:.0f}s")
+        self.response = response
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Token bucket whose rate is re-synced from GitHub's quota headers.
+    
+    With ``shares > 1`` the bucket is one of that many processes spending the same
+    quota, and paces itself to its even share of the rate, burst and remaining calls.
+    """
+    
+    def __init__(self, max_rate: float, burst: int, shares: int = 1):
+        self.shares = shares
+        self.max_rate = max_rate / shares
+        self.rate = self.max_rate
+        self.capacity = max(float(burst) / shares, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+    
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def reserve(self) -> float:
+        """Take a token and return how long the caller must wait before using it."""
+        now = time.monotonic()
+        self._refill(now)
+        self.tokens -= 1
+        delay = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(delay, self.blocked_until - now)
+    
+    def sync(self, remaining: int, reset_at: float) -> None:
+        """Spread the remaining quota evenly over the rest of the window."""
+        now = time.monotonic()
+        self._refill(now)
+        seconds_left = max(reset_at - time.time(), 1.0)
+        
+        if remaining <= 0:
+            self.block(seconds_left)
+            return
+        
+        share = remaining / self.shares
+        self.rate = min(self.max_rate, share / seconds_left)
+        self.tokens = min(self.tokens, share)
+    
+    def block(self, seconds: float) -> None:
+        """Hold every caller for ``seconds``."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class RateLimitScheduler:
+    """Paces all GitHub calls per quota resource (core, search, graphql)."""
+    
+    def __init__(self, max_rate: Optional[float] = None, burst: Optional[int] = None, shares: int = 1):
+        self.max_rate = max_rate or settings.GITHUB_MAX_REQUESTS_PER_SECOND
+        self.burst = burst or settings.GITHUB_BURST
+        self.shares = shares
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+    
+    def set_shares(self, shares: int) -> None:
+        """Split the quota evenly with ``shares`` processes (this one included) using the same token."""
+        with self._lock:
+            self.shares = max(shares, 1)
+            self._buckets.clear()
+    
+    def _bucket(self, resource: str) -> TokenBucket:
+        if resource not in self._buckets:
+            self._buckets[resource] = TokenBucket(self.max_rate, self.burst, self.shares)
+        return self._buckets[resource]
+    
+    def _reserve(self, resource: str) -> float:
+        with self._lock:
+            return self._bucket(resource).reserve()
+    
+    def acquire(self, resource: str = "core") -> None:
+        """Block the calling thread until a request may be sent."""
+        delay = self._reserve(resource)
+        if delay > 0:
+            time.sleep(delay)
+    
+    async def acquire_async(self, resource: str = "core") -> None:
+        """Wait on the event loop until a request may be sent."""
+        delay = self._reserve(resource)
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def observe(self, resource: str, response: httpx.Response) -> None:
+        """Update the bucket from response headers; raise if the request was rate limited."""
+        headers = response.headers
+        # GitHub reports which quota a response counted against
+        resource = headers.get("X-RateLimit-Resource", resource)
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        
+        with self._lock:
+            bucket = self._bucket(resource)
+            if remaining is not None and reset is not None:
+                bucket.sync(int(remaining), float(reset))
+            
+            retry_after = self._retry_after(response)
+            if retry_after is not None:
+                bucket.block(retry_after)
+        
+        if retry_after is not None:
+            raise RateLimitExceeded(response, retry_after)
+    
+    def _retry_after(self, response: httpx.Response) -> Optional[float]:
+        """Seconds to wait if ``response`` is a primary or secondary rate-limit rejection."""
+        if response.status_code not in (403, 429):
+            return None
+        
+        headers = response.headers
+        if "Retry-After" in headers:
+            return float(headers["Retry-After"])
+        
+        if headers.get("X-RateLimit-Remaining") == "0" and "X-RateLimit-Reset" in headers:
+            return max(float(headers["X-RateLimit-Reset"]) - time.time(), 1.0)
+        
+        if response.status_code == 429 or "rate limit" in response.text.lower():
+            return SECONDARY_LIMIT_WAIT
+        
+        # Plain 403 (e.g. forbidden repo) is not a rate limit
+        return None
+
+
+_backoff = wait_exponential(multiplier=1, max=SECONDARY_LIMIT_WAIT)
+
+
+def wait_for_rate_limit(retry_state) -> float:
+    """Tenacity wait: honour the server's retry delay, else back off exponentially."""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimitExceeded):
+        return max(exc.retry_after, _backoff(retry_state))
+    return _backoff(retry_state)
+
+
+github_rate_limiter = RateLimitScheduler()
@@ -0,0 +1,141 @@
+"""Persistent ETag / Last-Modified cache for GitHub API responses."""
+
+import json
+import sqlite3
+import time
+from typing import Dict, Optional
+
+import httpx
+
+from utils.sqlite_store import SQLiteStore
+
+
+# Headers replayed on cached responses; body encodings are already decoded.
+# Link is kept so cached pages can still be followed.
+_KEPT_HEADERS = ("content-type", "etag", "last-modified", "link")
+
+
+class CachedResponse:
+    """A stored response body plus the validators needed to revalidate it."""
+    
+    def __init__(self, url: str, headers: Dict[str, str], body: bytes, fetched_at: float):
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.fetched_at = fetched_at
+    
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+    
+    @property
+    def last_modified(self) -> Optional[str]:
+        return self.headers.get("last-modified")
+    
+    def is_fresh(self, max_age: float) -> bool:
+        """True if the entry is young enough to serve without revalidating."""
+        return max_age > 0 and time.time() - self.fetched_at < max_age
+    
+    def conditional_headers(self) -> Dict[str, str]:
+        """Headers that turn the next request into a conditional one."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+    
+    def to_response(self) -> httpx.Response:
+        """Rebuild a 200 response from the stored body."""
+        return httpx.Response(
+            200,
+            headers=self.headers,
+            content=self.body,
+            request=httpx.Request("GET", self.url),
+        )
+
+
+class ResponseCache(SQLiteStore):
+    """SQLite-backed response store with least-recently-used eviction by total size."""
+    
+    SCHEMA = (
+        """
+        CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY,
+            url TEXT NOT NULL,
+            headers TEXT NOT NULL,
+            body BLOB NOT NULL,
+            size INTEGER NOT NULL,
+            fetched_at REAL NOT NULL,
+            accessed_at REAL NOT NULL
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)",
+    )
+    
+    def __init__(self, path: str, max_bytes: int, max_age: float = 0.0):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key_for(url: str, headers: Optional[Dict[str, str]] = None, params: Optional[Dict] = None) -> str:
+        """Cache key: the Accept header and the full URL with query parameters."""
+        request = httpx.Request("GET", url, params=params)
+        accept = (headers or {}).get("Accept", "")
+        return f"{accept} {request.url}"
+    
+    def get(self, key: str) -> Optional[CachedResponse]:
+        """Look up a stored response and mark it as recently used."""
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT url, headers, body, fetched_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+        return CachedResponse(row[0], json.loads(row[1]), row[2], row[3])
+    
+    def put(self, key: str, response: httpx.Response) -> None:
+        """Store a 200 response that carries a validator, then evict down to size."""
+        headers = {name: response.headers[name] for name in _KEPT_HEADERS if name in response.headers}
+        if "etag" not in headers and "last-modified" not in headers and self.max_age <= 0:
+            return
+        
+        body = response.content
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, str(response.request.url), json.dumps(headers), body, len(body), now, now),
+            )
+            self._evict(conn)
+    
+    def touch(self, key: str) -> None:
+        """Record a successful revalidation (304) so freshness restarts."""
+        now = time.time()
+        with self._lock:
+            self._connect().execute(
+                "UPDATE responses SET fetched_at = ?, accessed_at = ? WHERE key = ?", (now, now, key)
+            )
+    
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """Drop least recently used entries until the cache fits in ``max_bytes``."""
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY accessed_at").fetchall():
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit counters since startup."""
+        return {"hits": self.hits, "revalidated": self.revalidated, "misses": self.misses}
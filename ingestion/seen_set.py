@@ -0,0 +1,61 @@
+"""Compact membership set for deduplicating crawled repo names."""
+
+import hashlib
+
+import numpy as np
+
+
+class SeenSet:
+    """Set of case-insensitive names kept as 64-bit hashes in an open-addressing table.
+    
+    Costs 8-16 bytes per name instead of a Python string plus set slot, so a crawl
+    can remember millions of names. A false "seen" needs a 64-bit hash collision.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        size = 1
+        while size < capacity * 2:
+            size *= 2
+        self._table = np.zeros(size, dtype=np.uint64)
+        self._size = 0
+    
+    @staticmethod
+    def _hash(name: str) -> int:
+        digest = hashlib.blake2b(name.lower().encode("utf-8"), digest_size=8).digest()
+        # 0 marks an empty slot
+        return int.from_bytes(digest, "little") or 1
+    
+    def _find(self, key: int) -> int:
+        """Slot holding ``key``, or the empty slot where it would go (linear probing)."""
+        mask = len(self._table) - 1
+        slot = key & mask
+        while True:
+            value = int(self._table[slot])
+            if value == 0 or value == key:
+                return slot
+            slot = (slot + 1) & mask
+    
+    def _grow(self) -> None:
+        keys = self._table[self._table != 0]
+        self._table = np.zeros(len(self._table) * 2, dtype=np.uint64)
+        for key in keys.tolist():
+            self._table[self._find(key)] = key
+    
+    def add(self, name: str) -> bool:
+        """Remember ``name``; returns True if it had not been seen before."""
+        key = self._hash(name)
+        slot = self._find(key)
+        if int(self._table[slot]) == key:
+            return False
+        self._table[slot] = key
+        self._size += 1
+        if self._size * 2 > len(self._table):
+            self._grow()
+        return True
+    
+    def __contains__(self, name: str) -> bool:
+        key = self._hash(name)
+        return int(self._table[self._find(key)]) == key
+    
+    def __len__(self) -> int:
+        return self._size
@@ -0,0 +1,171 @@
+"""Multi-process ingestion: shard repos across spawned workers, each with its own clients."""
+
+import asyncio
+import multiprocessing
+import queue
+import time
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import settings
+from .job_queue import JobQueue, worker_id
+from .manifest import IngestManifest
+from .pipeline import IngestionPipeline
+from .rate_limiter import github_rate_limiter
+
+
+def parallel_supported() -> bool:
+    """Local vector and graph stores live in one process's memory, so workers need the remote backends."""
+    return settings.VECTOR_BACKEND != "local" and settings.GRAPH_BACKEND != "local"
+
+
+def _run_pipeline(
+    full_names: Iterable[str],
+    graphql: bool,
+    manifest: Optional[IngestManifest],
+    queue: Optional[JobQueue] = None,
+) -> Dict[str, Any]:
+    """Run one pipeline in this process and return its counters in a picklable form."""
+    pipeline = IngestionPipeline(graphql=graphql, manifest=manifest, queue=queue)
+    written = asyncio.run(pipeline.run(full_names))
+    return {
+        "written": written,
+        "skipped": pipeline.skipped,
+        "stages": {
+            name: {"processed": stats.processed, "failed": stats.failed, "busy_seconds": stats.busy_seconds}
+            for name, stats in pipeline.stats.items()
+        },
+    }
+
+
+def _merge(total: Optional[Dict[str, Any]], part: Dict[str, Any]) -> Dict[str, Any]:
+    """Add one worker's counters into the running total."""
+    if total is None:
+        return part
+    merged = {"written": total["written"] + part["written"], "skipped": total["skipped"] + part["skipped"], "stages": {}}
+    for name, stats in total["stages"].items():
+        merged["stages"][name] = {key: value + part["stages"][name][key] for key, value in stats.items()}
+    return merged
+
+
+def _init_worker(workers: int) -> None:
+    """Pool initializer: every worker paces its GitHub calls to its share of the one quota."""
+    github_rate_limiter.set_shares(workers)
+
+
+def _ingest_shard(task: Tuple[List[str], bool, bool]) -> Dict[str, Any]:
+    """Worker entry point: ingest one shard of repo names.
+    
+    The fetcher, Pinecone and Neo4j singletons are created when the spawned process
+    imports them, so every worker has its own connection pools.
+    """
+    full_names, graphql, incremental = task
+    manifest = IngestManifest(settings.INGEST_MANIFEST_PATH) if incremental else None
+    try:
+        return _run_pipeline(full_names, graphql, manifest)
+    finally:
+        if manifest:
+            manifest.close()
+
+
+def _drain_queue(task: Tuple[bool, bool]) -> Dict[str, Any]:
+    """Worker entry point: drain the shared job queue until nothing is left to retry."""
+    graphql, incremental = task
+    queue = JobQueue(settings.INGEST_JOB_PATH)
+    manifest = IngestManifest(settings.INGEST_MANIFEST_PATH) if incremental else None
+    worker = worker_id()
+    total = None
+    try:
+        while True:
+            total = _merge(total, _run_pipeline(queue.drain(worker), graphql, manifest, queue))
+            queue.fail_unfinished(worker, "not written")
+            if not queue.wait_for_retry():
+                return total
+    finally:
+        queue.close()
+        if manifest:
+            manifest.close()
+
+
+def print_summary(total: Dict[str, Any], elapsed: float, workers: int) -> None:
+    """Print stage counters summed over every worker, with throughput against wall-clock time."""
+    print(f"\nPipeline stages ({workers} workers, {elapsed:.1f}s wall):")
+    for name, stats in total["stages"].items():
+        throughput = stats["processed"] / elapsed if elapsed else 0.0
+        print(
+            f"  {name:6} {stats['processed']:5} ok {stats['failed']:4} failed "
+            f"{throughput:8.2f} repos/s  (busy {stats['busy_seconds']:.1f}s across workers)"
+        )
+    if total["skipped"]:
+        print(f"  {total['skipped']} unchanged repos skipped")
+
+
+def _shards(repos: Iterable[str], size: int, graphql: bool, incremental: bool) -> Iterator[Tuple[List[str], bool, bool]]:
+    names = iter(repos)
+    while True:
+        shard = list(islice(names, size))
+        if not shard:
+            return
+        yield shard, graphql, incremental
+
+
+def ingest_parallel(repos: Iterable[str], workers: int, graphql: bool = False, incremental: bool = False) -> int:
+    """Shard ``repos`` across ``workers`` processes; returns how many were written or already up to date.
+    
+    ``repos`` may be a crawler generator: at most two shards per worker are cut from
+    it ahead of the workers, the next one only when a shard finishes.
+    """
+    size = settings.INGEST_SHARD_SIZE
+    if isinstance(repos, list):
+        # Small lists still spread over every worker
+        size = max(min(size, -(-len(repos) // workers)), 1)
+    
+    started = time.perf_counter()
+    total = None
+    parts: queue.Queue = queue.Queue()
+    submitted = done = 0
+    
+    def collect() -> None:
+        nonlocal total, done
+        part = parts.get()
+        if isinstance(part, BaseException):
+            raise part
+        done += 1
+        total = _merge(total, part)
+        print(f"  [{done} shards] {total['written']} written, {total['skipped']} unchanged")
+    
+    with multiprocessing.get_context("spawn").Pool(workers, _init_worker, (workers,)) as pool:
+        shards = _shards(repos, size, graphql, incremental)
+        while True:
+            while submitted - done >= workers * 2:
+                collect()
+            shard = next(shards, None)
+            if shard is None:
+                break
+            pool.apply_async(_ingest_shard, (shard,), callback=parts.put, error_callback=parts.put)
+            submitted += 1
+        while done < submitted:
+            collect()
+    
+    if total is None:
+        return 0
+    print_summary(total, time.perf_counter() - started, workers)
+    return total["written"] + total["skipped"]
+
+
+def drain_parallel(queue: JobQueue, workers: int, graphql: bool = False, incremental: bool = False) -> int:
+    """Drain ``queue`` with ``workers`` processes, reporting its progress until they all finish."""
+    started = time.perf_counter()
+    with multiprocessing.get_context("spawn").Pool(workers, _init_worker, (workers,)) as pool:
+        result = pool.map_async(_drain_queue, [(graphql, incremental)] * workers)
+        while not result.ready():
+            result.wait(settings.INGEST_PROGRESS_SECONDS)
+            counts = queue.counts()
+            print("  Job queue: " + ", ".join(f"{count} {state}" for state, count in sorted(counts.items())))
+        parts = result.get()
+    
+    total = None
+    for part in parts:
+        total = _merge(total, part)
+    print_summary(total, time.perf_counter() - started, workers)
+    return total["written"] + total["skipped"]
@@ -1,6 +1,7 @@
 """Seed database with sample AI/ML repositories."""
 
 from db import pinecone_client, neo4j_client
+from db.packages import canonical_package_name
 
 
 SEED_REPOS = [
@@ -116,24 +117,32 @@ def seed_database():
     
     print("\n" + "="*60)
     
-    for i, repo in enumerate(SEED_REPOS, 1):
-        print(f"\n[{i}/{len(SEED_REPOS)}] Processing: {repo['full_name']}")
-        
-        pinecone_client.upsert_repo(
-            repo_id=repo['full_name'],
-            readme_text=repo['readme'],
-            metadata={
+    print(f"\nEmbedding and upserting {len(SEED_REPOS)} READMEs...")
+    failed = pinecone_client.upsert_repos([
+        {
+            "repo_id": repo['full_name'],
+            "readme_text": repo['readme'],
+            "metadata": {
                 "name": repo['name'],
                 "description": repo['description'],
                 "stars": repo['stars'],
+                "forks": 0,
                 "language": repo['language'],
+                "topics": [],
+                "dependencies": sorted(canonical_package_name(dep) for dep in repo['dependencies']),
                 "url": repo['url']
             }
-        )
-        
-        neo4j_client.create_repo_node(
-            full_name=repo['full_name'],
-            metadata={
+        }
+        for repo in SEED_REPOS
+    ])
+    if failed:
+        print(f"  Failed to upsert: {', '.join(failed)}")
+    
+    print(f"\nWriting {len(SEED_REPOS)} repos to Neo4j...")
+    neo4j_client.create_repo_nodes([
+        (
+            repo['full_name'],
+            {
                 "name": repo['name'],
                 "description": repo['description'],
                 "stars": repo['stars'],
@@ -142,17 +151,18 @@ def seed_database():
                 "url": repo['url']
             }
         )
-        
-        if repo['dependencies']:
-            for dep in repo['dependencies']:
-                dep_repo = next((r for r in SEED_REPOS if r['name'] == dep), None)
-                if dep_repo:
-                    neo4j_client.create_dependency(
-                        from_repo=repo['full_name'],
-                        to_repo=dep_repo['full_name']
-                    )
-        
-        print(f"  Done!")
+        for repo in SEED_REPOS
+    ])
+    
+    seeded = {repo['name']: repo['full_name'] for repo in SEED_REPOS}
+    edges = [
+        (repo['full_name'], seeded[dep])
+        for repo in SEED_REPOS
+        for dep in repo['dependencies']
+        if dep in seeded
+    ]
+    neo4j_client.create_dependencies(edges)
+    print(f"  Done! {len(edges)} dependencies")
     
     print("\n" + "="*60)
     print("\nDatabase Statistics:")
@@ -164,6 +174,7 @@ def seed_database():
     print(f"  Pinecone: {pinecone_stats.get('total_vector_count', 0)} vectors")
     
     print("\nDatabase seeding complete!")
+    pinecone_client.persist()
     neo4j_client.close()
 
 
@@ -0,0 +1 @@
+"""Shared helpers with no service dependencies."""
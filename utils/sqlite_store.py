@@ -0,0 +1,45 @@
+"""Shared base for the small SQLite-backed stores."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional, Tuple
+
+from config import settings
+
+
+class SQLiteStore:
+    """One lazily opened SQLite connection, shared by threads behind a lock.
+    
+    The file is opened in autocommit and WAL mode so several processes can use it at
+    once; writers wait up to SQLITE_BUSY_TIMEOUT seconds for each other's locks.
+    Subclasses list their CREATE statements in ``SCHEMA``.
+    """
+    
+    SCHEMA: Tuple[str, ...] = ()
+    
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(
+                str(self.path),
+                check_same_thread=False,
+                isolation_level=None,
+                timeout=settings.SQLITE_BUSY_TIMEOUT,
+            )
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            for statement in self.SCHEMA:
+                self._conn.execute(statement)
+        return self._conn
+    
+    def close(self) -> None:
+        """Close the underlying database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None